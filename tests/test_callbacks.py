@@ -0,0 +1,19 @@
+import vibelift_bot as vb
+
+
+def test_cursors_stay_inline_and_ids_get_tokens(monkeypatch):
+    state = vb.UserState({'callback_tokens': {}})
+    monkeypatch.setattr(vb, 'users', state)
+    monkeypatch.setattr(vb, 'callback_tokens', vb.CallbackTokens())
+    position = (1, 29869922, -275, 123)
+
+    data = vb.cb('pg', 'tk', position)
+    assert data == 'pg:tk:1.29869922.-275.123'
+    assert vb.decode_cursor(data.split(':')[2]) == position
+    assert vb.cb('pb', 'po', 123456789012345678) == 'pb:po:123456789012345678'
+    assert state['callback_tokens'] == {}
+
+    order_id = '3f2b8c1e-5d6a-4b7c-9e0f-1a2b3c4d5e6f'
+    route, token = vb.cb('ao', order_id).split(':')
+    assert vb.callback_tokens.resolve(token) == order_id
+    assert len(state['callback_tokens']) == 1
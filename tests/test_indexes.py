@@ -0,0 +1,52 @@
+import asyncio
+
+import vibelift_bot as vb
+
+
+ENGAGERS = {
+    '1': {'earnings': 100, 'signup_bonus': 500, 'xp': 30, 'claims': ['o1'], 'awaiting_payout': True},
+    '2': {'xp': 50, 'balance': 0, 'task_count': 0},
+    '3': {'earnings': 20, 'xp': 10, 'claims': [], 'awaiting_payout': False},
+}
+
+
+def test_startup_leaves_engagers_undecoded_until_first_use(tmp_path, monkeypatch):
+    vb.write_snapshot_pack(str(tmp_path / 'snapshot.vls'), {
+        'engagers': vb.dumps_bytes(ENGAGERS),
+        'active_orders': vb.dumps_bytes({}),
+    })
+    state = vb.UserState(asyncio.run(vb.ShardedJournalStore(str(tmp_path), snapshot_format='binary').load()))
+    monkeypatch.setattr(vb, 'users', state)
+    vb.ensure_collections(state)
+    vb.rebuild_indexes(state)
+    assert isinstance(dict.__getitem__(state, 'engagers'), vb.LazyCollection)
+
+    assert vb.task_index.has_claimed('1', 'o1')
+    assert not vb.task_index.has_claimed('2', 'o1')
+    assert list(vb.payout_queue.amounts.items()) == [('1', 600)]
+    assert vb.payout_queue.total == 600
+    assert [vb.leaderboard_index.rank(uid) for uid in '123'] == [2, 1, 3]
+    assert not state['engagers'].touched  # lookups alone write nothing back
+
+
+def test_changes_made_before_first_use_are_counted_once(monkeypatch):
+    state = vb.UserState({'engagers': {uid: dict(data) for uid, data in ENGAGERS.items()}})
+    vb.ensure_collections(state)
+    monkeypatch.setattr(vb, 'users', state)
+    vb.rebuild_indexes(state)
+
+    state['engagers']['1']['earnings'] += 20
+    vb.payout_queue.adjust('1', 20)
+    state['engagers']['3']['awaiting_payout'] = True
+    vb.payout_queue.add('3', 20)
+    state['engagers']['2']['xp'] = 5
+    vb.leaderboard_index.update('2', 5)
+    state['engagers']['3']['claims'].append('o2')
+    vb.task_index.claim('3', 'o2')
+
+    assert vb.payout_queue.amounts == {'1': 620, '3': 20}
+    assert vb.payout_queue.total == 640
+    assert vb.leaderboard_index.top() == [('1', 30), ('3', 10), ('2', 5)]
+    assert vb.task_index.claimed('3') == {'o2'}
+    vb.payout_queue.adjust('1', 5)
+    assert vb.payout_queue.total == 645
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+import vibelift_bot as vb
+
+mongomock_motor = pytest.importorskip('mongomock_motor')
+
+
+def make_store():
+    return vb.MongoStore(client=mongomock_motor.AsyncMongoMockClient(), db_name='vibelift_test')
+
+
+def test_round_trip_through_load():
+    async def run():
+        store = make_store()
+        await store.load()
+        await store.write([
+            {'c': 'engagers', 'k': '1', 'v': {'xp': 10, 'earnings': 20, 'claims': []}},
+            {'c': 'pending_orders', 'k': 'o1', 'v': {'client_id': '5', 'price': 100}},
+            {'c': 'daily_tip', 'k': '1', 'v': 16},
+        ])
+        # The order moves from pending to active in one flush.
+        await store.write([
+            {'c': 'pending_orders', 'k': 'o1', 'd': 1},
+            {'c': 'active_orders', 'k': 'o1', 'v': {'client_id': '5', 'price': 100}},
+        ], durable=True)
+        return await make_reloaded(store).load()
+
+    state = asyncio.run(run())
+    assert state['engagers'] == {'1': {'xp': 10, 'earnings': 20, 'claims': []}}
+    assert state['pending_orders'] == {}
+    assert state['active_orders'] == {'o1': {'client_id': '5', 'price': 100}}
+    assert state['daily_tip'] == {'1': 16}
+
+
+def make_reloaded(store):
+    return vb.MongoStore(client=store.client, db_name='vibelift_test')
+
+
+def test_engager_counters_are_incremented_and_dropped_fields_unset():
+    async def run():
+        store = make_store()
+        await store.load()
+        await store.write([{'c': 'engagers', 'k': '1', 'v': {'xp': 10, 'earnings': 20, 'current_task': 'o1'}}])
+        # Another writer bumps the counter behind our back; $inc must not clobber it.
+        await store.db.engagers.update_one({'_id': '1'}, {'$inc': {'xp': 5}})
+        await store.write([{'c': 'engagers', 'k': '1', 'v': {'xp': 20, 'earnings': 20}}])
+        return await store.db.engagers.find_one({'_id': '1'})
+
+    doc = asyncio.run(run())
+    assert doc['xp'] == 25
+    assert doc['earnings'] == 20
+    assert 'current_task' not in doc
+
+
+def test_whole_collection_replace():
+    async def run():
+        store = make_store()
+        await store.load()
+        await store.write([{'c': 'clients', 'k': '1', 'v': {'step': 'active'}}])
+        await store.write([{'c': 'clients', 'v': {'2': {'step': 'awaiting_payment'}}}])
+        return (await make_reloaded(store).load())['clients']
+
+    assert asyncio.run(run()) == {'2': {'step': 'awaiting_payment'}}
+
+
+class GatedCollection:
+    def __init__(self, collection, gate, log):
+        self.collection = collection
+        self.gate = gate
+        self.log = log
+
+    async def bulk_write(self, ops, ordered=True):
+        self.log.append('start')
+        await self.gate.wait()
+        result = await self.collection.bulk_write(ops, ordered=ordered)
+        self.log.append('done')
+        return result
+
+
+class GatedDb:
+    def __init__(self, db, gate, log):
+        self.db = db
+        self.gate = gate
+        self.log = log
+
+    def __getitem__(self, name):
+        return GatedCollection(self.db[name], self.gate, self.log)
+
+
+def test_writes_are_serialized_and_empty_durable_write_waits():
+    async def run():
+        store = make_store()
+        await store.load()
+        gate, log = asyncio.Event(), []
+        store.db = GatedDb(store.db, gate, log)
+        store.durable_db = GatedDb(store.durable_db, gate, log)
+        first = asyncio.create_task(store.write([{'c': 'clients', 'k': '1', 'v': {'step': 'old'}}]))
+        second = asyncio.create_task(store.write([{'c': 'clients', 'k': '1', 'v': {'step': 'new'}}]))
+        barrier = asyncio.create_task(store.write([], durable=True))
+        await asyncio.sleep(0.01)
+        assert log == ['start']  # the second write hasn't started alongside the first
+        assert not barrier.done()
+        gate.set()
+        await asyncio.gather(first, second, barrier)
+        assert log == ['start', 'done', 'start', 'done']
+        return await store.db.db.clients.find_one({'_id': '1'})
+
+    assert asyncio.run(run())['step'] == 'new'
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+import vibelift_bot as vb
+
+
+class DrainingPaystack:
+    """Runs the background flusher's drain in the middle of each call, then answers."""
+
+    async def initialize_transaction(self, **kwargs):
+        vb.collect_user_changes(vb.users)
+        return {'authorization_url': 'https://checkout.paystack.com/abc', 'access_code': 'abc'}
+
+    async def verify_transaction(self, reference):
+        vb.collect_user_changes(vb.users)
+        raise vb.PaystackError('verify failed: 502', 502)
+
+
+@pytest.fixture
+def state(monkeypatch):
+    state = vb.UserState({'pending_orders': {'o1': {'client_id': '7', 'platform': 'instagram', 'price': 1000}}})
+    vb.ensure_collections(state)
+    monkeypatch.setattr(vb, 'users', state)
+    monkeypatch.setattr(vb, 'paystack', DrainingPaystack())
+
+    async def save_users():
+        pass
+
+    monkeypatch.setattr(vb, 'save_users', save_users)
+    vb.collect_user_changes(state)
+    return state
+
+
+def test_payment_link_is_journaled_after_a_flush_during_the_api_call(state):
+    order = state['pending_orders']['o1']
+    link = asyncio.run(vb.issue_payment_link('o1', order, 'a@b.c'))
+    records = [r for r in vb.collect_user_changes(state) if r['c'] == 'pending_orders']
+    assert records == [{'c': 'pending_orders', 'k': 'o1', 'v': state['pending_orders']['o1']}]
+    assert records[0]['v']['payment_link'] == link
+
+
+def test_verify_attempt_is_journaled_after_a_flush_during_the_api_call(state):
+    state['payment_events']['ref1'] = {'order_id': 'o1', 'attempts': 0, 'source': 'webhook'}
+    vb.collect_user_changes(state)
+
+    async def run():
+        await vb.PaymentQueue()._process('ref1')
+
+    asyncio.run(run())
+    records = [r for r in vb.collect_user_changes(state) if r['c'] == 'payment_events']
+    assert records == [{'c': 'payment_events', 'k': 'ref1', 'v': {'order_id': 'o1', 'attempts': 1, 'source': 'webhook'}}]
@@ -0,0 +1,150 @@
+import asyncio
+import socket
+
+import pytest
+from aiohttp import web
+
+import vibelift_bot as vb
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(vb, 'PAYSTACK_RETRY_DELAY', 0)
+
+
+class StubPaystack:
+    """A local stand-in for the Paystack API; `answers` queues (status, body) per path."""
+
+    def __init__(self):
+        self.answers = {}
+        self.hits = []
+        self.peers = []
+        self.delay = 0
+        self.app = web.Application()
+        self.app.router.add_route('*', '/{path:.*}', self.handle)
+
+    async def handle(self, request):
+        self.hits.append((request.method, request.path, dict(request.query), request.headers.get('Authorization')))
+        self.peers.append(request.transport.get_extra_info('peername')[1])
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        queued = self.answers.get(request.path) or [(200, {'status': True, 'data': {'path': request.path}})]
+        status, body = queued.pop(0) if len(queued) > 1 else queued[0]
+        return web.json_response(body, status=status)
+
+    async def __aenter__(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{self.runner.addresses[0][1]}"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+
+def run(scenario):
+    async def wrapped():
+        async with StubPaystack() as stub:
+            client = vb.PaystackClient('sk_test', stub.url, timeout=2)
+            try:
+                return await scenario(stub, client)
+            finally:
+                await client.close()
+    return asyncio.run(wrapped())
+
+
+def test_calls_share_one_pooled_session():
+    async def scenario(stub, client):
+        await client.verify_transaction('o1')
+        session = client.session
+        await client.verify_transaction('o2')
+        data, meta = await client.list_transactions(page=2, per_page=10, status='success', since='2026-01-01T00:00:00')
+        assert client.session is session
+        assert len(set(stub.peers)) == 1  # one kept-alive connection
+        assert stub.hits[0][3] == 'Bearer sk_test'
+        assert stub.hits[2][2] == {'page': '2', 'perPage': '10', 'status': 'success', 'from': '2026-01-01T00:00:00'}
+        assert client.metrics() == {'calls': 3, 'errors': 0, 'retries': 0, 'open': True}
+    run(scenario)
+
+
+def test_non_2xx_raises_with_status_and_payload():
+    async def scenario(stub, client):
+        stub.answers['/transaction/verify/nope'] = [(404, {'status': False, 'message': 'Transaction reference not found'})]
+        with pytest.raises(vb.PaystackError) as caught:
+            await client.verify_transaction('nope')
+        assert caught.value.http_status == 404
+        assert caught.value.payload['message'] == 'Transaction reference not found'
+        assert len(stub.hits) == 1  # a 4xx is not retried
+    run(scenario)
+
+
+def test_status_false_raises_even_on_200():
+    async def scenario(stub, client):
+        stub.answers['/transaction/initialize'] = [(200, {'status': False, 'message': 'Duplicate Transaction Reference'})]
+        with pytest.raises(vb.PaystackError) as caught:
+            await client.initialize_transaction('a@b.c', 100000, 'o1')
+        assert caught.value.http_status == 200
+    run(scenario)
+
+
+def test_get_retries_a_5xx_then_succeeds():
+    async def scenario(stub, client):
+        stub.answers['/transaction/verify/o1'] = [
+            (503, {'status': False, 'message': 'Service unavailable'}),
+            (200, {'status': True, 'data': {'status': 'success'}}),
+        ]
+        assert await client.verify_transaction('o1') == {'status': 'success'}
+        assert len(stub.hits) == 2
+        assert client.stats['retries'] == 1
+    run(scenario)
+
+
+def test_get_gives_up_after_the_retry_budget():
+    async def scenario(stub, client):
+        stub.answers['/transaction'] = [(502, {'status': False, 'message': 'Bad gateway'})]
+        with pytest.raises(vb.PaystackError) as caught:
+            await client.list_transactions()
+        assert caught.value.http_status == 502
+        assert len(stub.hits) == 1 + vb.PAYSTACK_RETRIES
+    run(scenario)
+
+
+def test_post_is_never_retried():
+    async def scenario(stub, client):
+        stub.answers['/transaction/initialize'] = [(500, {'status': False, 'message': 'Server error'})]
+        with pytest.raises(vb.PaystackError):
+            await client.initialize_transaction('a@b.c', 100000, 'o1')
+        assert len(stub.hits) == 1
+    run(scenario)
+
+
+def test_per_call_timeout_raises_paystack_error():
+    async def scenario(stub, client):
+        stub.delay = 0.5
+        with pytest.raises(vb.PaystackError) as caught:
+            await client.initialize_transaction('a@b.c', 100000, 'o1', timeout=0.1)
+        assert caught.value.http_status is None
+        assert isinstance(caught.value.__cause__, asyncio.TimeoutError)
+        stub.delay = 0.1
+        assert await client.verify_transaction('o1', timeout=1) == {'path': '/transaction/verify/o1'}
+    run(scenario)
+
+
+def test_connection_errors_raise_paystack_error():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    async def scenario():
+        client = vb.PaystackClient('sk_test', f"http://127.0.0.1:{port}")
+        try:
+            with pytest.raises(vb.PaystackError) as caught:
+                await client.verify_transaction('o1')
+            assert caught.value.http_status is None
+            assert client.stats == {'calls': 1 + vb.PAYSTACK_RETRIES, 'errors': 1 + vb.PAYSTACK_RETRIES,
+                                    'retries': vb.PAYSTACK_RETRIES}
+        finally:
+            await client.close()
+    asyncio.run(scenario())
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import pytest
+from aiohttp import web
+
+import vibelift_bot as vb
+
+
+def order(client_id, price=1000):
+    return {'client_id': client_id, 'platform': 'instagram', 'handle_or_url': '@someone',
+            'follows': 10, 'likes': 10, 'comments': 0, 'price': price}
+
+
+@pytest.fixture
+def state(monkeypatch):
+    state = vb.UserState({
+        'clients': {'7': {'step': 'awaiting_payment', 'order_id': 'o1'}},
+        'pending_orders': {'o1': order('7'), 'o3': order('7')},
+    })
+    vb.ensure_collections(state)
+    monkeypatch.setattr(vb, 'users', state)
+    monkeypatch.setattr(vb, 'PAYSTACK_RETRY_DELAY', 0)
+    monkeypatch.setattr(vb, 'reconcile_stats', {'runs': 0, 'fetched': 0, 'confirmed': 0, 'errors': 0, 'truncated': 0})
+    sent = []
+    monkeypatch.setattr(vb, 'enqueue_message', lambda chat_id, text, **kwargs: sent.append(chat_id))
+    monkeypatch.setattr(vb, 'enqueue_photo', lambda chat_id, photo, **kwargs: sent.append(chat_id))
+
+    async def noop(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(vb, 'flush_users', noop)
+    monkeypatch.setattr(vb, 'save_users', noop)
+    state.sent = sent
+    return state
+
+
+def paged(pages, requests):
+    async def handler(request):
+        requests.append(dict(request.query))
+        page = int(request.query['page'])
+        return web.json_response({'status': True, 'data': pages[page - 1], 'meta': {'pageCount': len(pages)}})
+    return handler
+
+
+def reconcile(monkeypatch, handler):
+    async def run():
+        app = web.Application()
+        app.router.add_get('/transaction', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        client = vb.PaystackClient('sk_test', f"http://127.0.0.1:{runner.addresses[0][1]}")
+        monkeypatch.setattr(vb, 'paystack', client)
+        try:
+            return await vb.reconcile_payments()
+        finally:
+            await client.close()
+            await runner.cleanup()
+    vb.rebuild_indexes(vb.users)
+    return asyncio.run(run())
+
+
+def test_confirms_by_metadata_and_by_reference(state, monkeypatch):
+    requests = []
+    pages = [[
+        {'reference': 'unrelated-ref', 'amount': 100000, 'metadata': {'order_id': 'o1'}},
+        {'reference': 'o3.2', 'amount': 100000, 'metadata': None},
+        {'reference': 'o9', 'amount': 100000},
+    ]]
+    started = time.time()
+    assert reconcile(monkeypatch, paged(pages, requests)) == 2
+    assert set(state['active_orders']) == {'o1', 'o3'}
+    assert state['active_orders']['o1']['paystack_reference'] == 'unrelated-ref'
+    assert state['active_orders']['o3']['paystack_reference'] == 'o3.2'
+    assert state['clients']['7']['step'] == 'awaiting_approval'
+    assert vb.payment_dedup.seen(vb.reference_key('o3.2'))
+    assert 7 in state.sent and vb.ADMIN_GROUP_ID in state.sent
+    assert state['reconciler']['paystack']['watermark'] >= started
+    assert requests[0]['status'] == 'success'
+
+
+def test_underpayment_is_not_confirmed(state, monkeypatch):
+    pages = [[{'reference': 'o1', 'amount': 99999}]]
+    assert reconcile(monkeypatch, paged(pages, [])) == 0
+    assert 'o1' in state['pending_orders']
+    assert not state['active_orders']
+
+
+def test_skips_references_the_webhook_already_confirmed(state, monkeypatch):
+    state['payment_seen'][vb.reference_key('o1')] = time.time() + 60
+    pages = [[{'reference': 'o1', 'amount': 100000}]]
+    assert reconcile(monkeypatch, paged(pages, [])) == 0
+    assert 'o1' in state['pending_orders']
+    assert vb.reconcile_stats['fetched'] == 1
+
+
+def test_paystack_error_keeps_the_watermark(state, monkeypatch):
+    state['reconciler']['paystack'] = {'watermark': 1000.0}
+
+    async def down(request):
+        return web.json_response({'status': False, 'message': 'Service unavailable'}, status=503)
+
+    assert reconcile(monkeypatch, down) == 0
+    assert state['reconciler']['paystack'] == {'watermark': 1000.0}
+    assert vb.reconcile_stats['errors'] == 1
+    assert 'o1' in state['pending_orders']
+
+
+def test_page_cap_keeps_the_watermark(state, monkeypatch):
+    monkeypatch.setattr(vb, 'RECONCILE_MAX_PAGES', 2)
+    watermark = time.time() - 3600
+    state['reconciler']['paystack'] = {'watermark': watermark}
+    requests = []
+    pages = [[{'reference': 'o1', 'amount': 100000}], [{'reference': 'x1', 'amount': 100}], [{'reference': 'o3', 'amount': 100000}]]
+    assert reconcile(monkeypatch, paged(pages, requests)) == 1
+    assert [r['page'] for r in requests] == ['1', '2']
+    assert state['reconciler']['paystack'] == {'watermark': watermark}
+    assert vb.reconcile_stats['truncated'] == 1
+    since = datetime.fromtimestamp(watermark - vb.RECONCILE_OVERLAP, timezone.utc).isoformat()
+    assert requests[0]['from'] == since
+
+
+def test_page_cap_on_first_run_pins_the_lookback(state, monkeypatch):
+    monkeypatch.setattr(vb, 'RECONCILE_MAX_PAGES', 1)
+    started = time.time()
+    pages = [[{'reference': 'x1', 'amount': 100}], [{'reference': 'x2', 'amount': 100}]]
+    reconcile(monkeypatch, paged(pages, []))
+    watermark = state['reconciler']['paystack']['watermark']
+    assert started - vb.RECONCILE_LOOKBACK <= watermark < started - vb.RECONCILE_LOOKBACK + 5
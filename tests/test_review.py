@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+import vibelift_bot as vb
+
+
+@pytest.fixture
+def state(monkeypatch):
+    state = vb.UserState({'engagers': {
+        '1': {'earnings': 400, 'signup_bonus': 500, 'xp': 0, 'awaiting_payout': True},
+        # Created through /engager: no earnings or signup_bonus yet.
+        '2': {'xp': 0, 'balance': 0, 'task_count': 0, 'awaiting_payout': True},
+        '3': {'earnings': 1000, 'signup_bonus': 0, 'xp': 0, 'awaiting_payout': True},
+    }})
+    vb.ensure_collections(state)
+    monkeypatch.setattr(vb, 'users', state)
+    vb.rebuild_indexes(state)
+    state.flushes = []
+    state.sent = []
+
+    async def flush_users(durable=True):
+        state.flushes.append(durable)
+
+    monkeypatch.setattr(vb, 'flush_users', flush_users)
+    monkeypatch.setattr(vb, 'enqueue_message', lambda chat_id, text, **kwargs: state.sent.append(chat_id))
+    return state
+
+
+def test_bulk_payout_pays_engagers_without_bonus_fields(state):
+    summary = asyncio.run(vb.run_bulk_review('p', True, ['1', '2', '3']))
+    assert summary.startswith('✅ Approved 3 payouts—₦1900 paid out')
+    assert all(not engager['awaiting_payout'] for engager in state['engagers'].values())
+    assert len(vb.payout_queue) == 0
+    assert state.flushes == [True]
+    assert state.sent == [1, 2, 3]
+
+
+def test_bulk_payout_failure_still_flushes_and_reports_the_rest(state, monkeypatch):
+    apply = vb.apply_payout_approval
+
+    def flaky(user_id):
+        if user_id == '2':
+            raise KeyError('earnings')
+        return apply(user_id)
+
+    monkeypatch.setattr(vb, 'apply_payout_approval', flaky)
+    summary = asyncio.run(vb.run_bulk_review('p', True, ['1', '2', '3']))
+    assert '✅ Approved 2 payouts—₦1900 paid out' in summary
+    assert '⚠️ 1 failed' in summary
+    assert state.flushes == [True]
+    assert state.sent == [1, 3]
+    assert state['engagers']['2']['awaiting_payout']
+    assert '2' in vb.payout_queue
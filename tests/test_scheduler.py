@@ -0,0 +1,80 @@
+import asyncio
+
+import vibelift_bot as vb
+
+
+def test_only_persisted_jobs_flush_when_they_fire(monkeypatch):
+    state = vb.UserState({'scheduler': {}})
+    monkeypatch.setattr(vb, 'users', state)
+    flushes = []
+
+    async def flush_users(durable=True):
+        flushes.append(dict(state['scheduler']))
+
+    monkeypatch.setattr(vb, 'flush_users', flush_users)
+    ran = []
+
+    async def run():
+        scheduler = vb.JobScheduler()
+
+        async def sweep():
+            ran.append('sweep')
+
+        async def tip():
+            ran.append('tip')
+
+        scheduler.register('sweep', sweep, every=30, persist=False)
+        scheduler.register('tip', tip, cron='0 9 * * *')
+        await scheduler.fire('sweep', 100.0)
+        assert flushes == []
+        await scheduler.fire('tip', 200.0)
+        assert flushes == [{'tip': {'last_run': 200.0}}]
+        await asyncio.sleep(0)
+        assert sorted(ran) == ['sweep', 'tip']
+        assert scheduler.fired == 2
+
+    asyncio.run(run())
+
+
+def test_one_shot_jobs_survive_a_restart_and_can_be_cancelled(monkeypatch):
+    state = vb.UserState({'scheduler': {}})
+    monkeypatch.setattr(vb, 'users', state)
+    flushed = []
+
+    async def flush_users(durable=True):
+        flushed.append(sorted(state['scheduler']))
+
+    monkeypatch.setattr(vb, 'flush_users', flush_users)
+    reminded = []
+
+    async def remind(user_id):
+        reminded.append(user_id)
+
+    async def before_restart():
+        scheduler = vb.JobScheduler()
+        scheduler.register_handler('remind', remind)
+        kept = await scheduler.schedule_once('remind', 0.05, user_id='5')
+        dropped = await scheduler.schedule_once('remind', 0.05, user_id='6')
+        assert flushed[-1] == sorted([kept, dropped])
+        return kept, dropped
+
+    kept, dropped = asyncio.run(before_restart())
+    assert state['scheduler'][kept]['handler'] == 'remind'
+    assert state['scheduler'][kept]['payload'] == {'user_id': '5'}
+
+    async def after_restart():
+        scheduler = vb.JobScheduler()
+        scheduler.register_handler('remind', remind)
+        scheduler.start()
+        assert scheduler.metrics()['pending_one_shots'] == 2
+        assert await scheduler.cancel(dropped)
+        assert not await scheduler.cancel(dropped)
+        await asyncio.sleep(0.2)
+        scheduler.task.cancel()
+        return scheduler
+
+    scheduler = asyncio.run(after_restart())
+    assert reminded == ['5']
+    assert state['scheduler'] == {}
+    assert flushed[-1] == []
+    assert scheduler.fired == 1
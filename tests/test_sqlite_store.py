@@ -0,0 +1,82 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+import vibelift_bot as vb
+
+
+def test_state_store_is_abstract():
+    class Partial(vb.StateStore):
+        async def load(self):
+            return {}
+
+    with pytest.raises(TypeError, match='write'):
+        Partial()
+
+
+def test_round_trip_moves_an_order_in_one_flush(tmp_path):
+    path = str(tmp_path / 'vibelift.db')
+    order = {'client_id': 5, 'platform': 'instagram', 'price': 100}
+
+    async def run():
+        store = vb.SQLiteStore(path)
+        state = vb.UserState(await store.load())
+        state['engagers']['1'] = {'xp': 10, 'earnings': 20, 'awaiting_payout': True}
+        state['pending_orders']['o1'] = dict(order)
+        state['daily_tip'] = {'1': 16}
+        await store.write(vb.collect_user_changes(state))
+
+        state['active_orders']['o1'] = state['pending_orders'].pop('o1')
+        state['daily_tip'].pop('1')
+        assert await store.write(vb.collect_user_changes(state), durable=True) > 0
+        await store.close()
+        reloaded = vb.SQLiteStore(path)
+        try:
+            return await reloaded.load()
+        finally:
+            await reloaded.close()
+
+    state = asyncio.run(run())
+    assert state['engagers'] == {'1': {'xp': 10, 'earnings': 20, 'awaiting_payout': True}}
+    assert state['pending_orders'] == {}
+    assert state['active_orders'] == {'o1': order}
+    assert state.get('daily_tip', {}) == {}
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT order_id, status, client_id FROM orders").fetchall() == [('o1', 'active', '5')]
+        assert conn.execute("SELECT user_id, awaiting_payout FROM engagers").fetchall() == [('1', 1)]
+
+
+def test_migrate_imports_a_legacy_users_json_and_its_journal(tmp_path):
+    snapshot = tmp_path / 'users.json'
+    snapshot.write_text(json.dumps({
+        'clients': {'5': {'step': 'awaiting_payment', 'order_id': 'o1'}},
+        'engagers': {'1': {'xp': 10}},
+        'pending_orders': {'o1': {'client_id': '5', 'price': 100}},
+        'referrals': {'1': {'referred_by': '2'}},
+        'tasks': {'o1-f1': {'order_id': 'o1', 'status': 'open'}},
+    }, indent=4))
+    (tmp_path / 'users.journal').write_text(
+        json.dumps({'c': 'engagers', 'k': '1', 'v': {'xp': 30}}) + '\n'
+        + json.dumps({'c': 'payment_seen', 'k': 'ref:o1', 'v': 123.0}) + '\n'
+    )
+    db_path = str(tmp_path / 'vibelift.db')
+
+    async def run():
+        await vb.migrate_to_sqlite(str(snapshot), db_path)
+        store = vb.SQLiteStore(db_path)
+        try:
+            return await store.load()
+        finally:
+            await store.close()
+
+    state = asyncio.run(run())
+    assert state['clients'] == {'5': {'step': 'awaiting_payment', 'order_id': 'o1'}}
+    assert state['engagers'] == {'1': {'xp': 30}}
+    assert state['pending_orders'] == {'o1': {'client_id': '5', 'price': 100}}
+    assert state['referrals'] == {'1': {'referred_by': '2'}}
+    assert state['payment_seen'] == {'ref:o1': 123.0}
+    assert 'tasks' not in state
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT user_id FROM clients WHERE step = 'awaiting_payment'").fetchall() == [('5',)]
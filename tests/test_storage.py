@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+
+import vibelift_bot as vb
+
+
+def record(key, value):
+    return {'c': 'engagers', 'k': key, 'v': value}
+
+
+def test_journal_append_after_torn_tail_survives_replay(tmp_path):
+    store = vb.JournalStore(str(tmp_path / 'engagers.json'), str(tmp_path / 'engagers.journal'))
+    store.write([record('1', {'xp': 1}), record('2', {'xp': 2})])
+    store._journal.close()
+    # Crash mid-append: half a record, no newline.
+    with open(store.journal_path, 'a') as f:
+        f.write(json.dumps(record('x', {'xp': 9}))[:15])
+
+    restarted = vb.JournalStore(store.snapshot_path, store.journal_path)
+    assert restarted.load() == {'engagers': {'1': {'xp': 1}, '2': {'xp': 2}}}
+    restarted.write([record('3', {'xp': 3})])
+    restarted._journal.close()
+
+    again = vb.JournalStore(store.snapshot_path, store.journal_path)
+    assert again.load()['engagers'] == {'1': {'xp': 1}, '2': {'xp': 2}, '3': {'xp': 3}}
+
+
+def test_journal_replay_skips_a_torn_line_in_the_middle(tmp_path):
+    store = vb.JournalStore(str(tmp_path / 'engagers.json'), str(tmp_path / 'engagers.journal'))
+    with open(store.journal_path, 'w') as f:
+        f.write(json.dumps(record('1', {'xp': 1})) + '\n')
+        f.write('{"c":"engag' + json.dumps(record('2', {'xp': 2})) + '\n')
+        f.write(json.dumps(record('3', {'xp': 3})) + '\n')
+    assert store.load()['engagers'] == {'1': {'xp': 1}, '3': {'xp': 3}}
+
+
+class FlakyStore(vb.StateStore):
+    def __init__(self):
+        self.fail = True
+        self.written = []
+
+    async def load(self):
+        return {}
+
+    async def write(self, records, durable=False):
+        if self.fail:
+            raise OSError('disk full')
+        self.written.extend(records)
+        return len(records)
+
+
+def test_failed_flush_keeps_changes_for_the_next_flush(monkeypatch):
+    store = FlakyStore()
+    state = vb.UserState({'engagers': {'1': {'xp': 0}}, 'clients': {}})
+    monkeypatch.setattr(vb, 'users', state)
+    monkeypatch.setattr(vb, 'users_store', store)
+    state['engagers']['1']['xp'] = 10
+    state['clients'] = {'7': {'step': 'active'}}
+
+    with pytest.raises(OSError):
+        asyncio.run(vb.flush_users())
+    assert vb.users_dirty
+
+    store.fail = False
+    asyncio.run(vb.flush_users())
+    assert not vb.users_dirty
+    assert {'c': 'engagers', 'k': '1', 'v': {'xp': 10}} in store.written
+    assert {'c': 'clients', 'v': {'7': {'step': 'active'}}} in store.written
@@ -0,0 +1,38 @@
+import asyncio
+from types import SimpleNamespace
+
+import vibelift_bot as vb
+
+
+class FakeMessage:
+    def __init__(self):
+        self.texts = []
+
+    async def edit_text(self, text, **kwargs):
+        self.texts.append(text)
+
+
+def test_claim_by_engager_without_claims_list(monkeypatch):
+    # The /engager signup flow creates engagers with no 'claims' key.
+    state = vb.UserState({
+        'engagers': {'5': {'xp': 0, 'balance': 0, 'task_count': 0}},
+        'active_orders': {'o1': {'client_id': '7', 'platform': 'instagram', 'handle_or_url': '@someone',
+                                 'follows': 1, 'likes': 0, 'comments': 0, 'price': 1000}},
+    })
+    vb.ensure_collections(state)
+    monkeypatch.setattr(vb, 'users', state)
+    vb.rebuild_indexes(state)
+
+    async def noop():
+        pass
+
+    monkeypatch.setattr(vb, 'save_users', noop)
+    message = FakeMessage()
+    update = SimpleNamespace(callback_query=SimpleNamespace(message=message))
+
+    asyncio.run(vb.claim_task(update, None, '5', 'o1'))
+    engager = state['engagers']['5']
+    assert engager['claims'] == ['o1']
+    assert engager['current_lease'] in state['task_leases']
+    assert vb.task_index.has_claimed('5', 'o1')
+    assert message.texts[0].startswith('Task *o1* claimed!')
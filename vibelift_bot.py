@@ -6,9 +6,25 @@ import random
 import uuid
 import logging
 import json
-from datetime import datetime, timezone
+import copy
+import sqlite3
+import sys
+import mmap
+import struct
+import functools
+import tempfile
+import heapq
+import bisect
+import abc
+import itertools
+import hmac
+import hashlib
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 import aiohttp
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardRemove, CallbackQuery
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -18,6 +34,12 @@ from telegram.ext import (
     filters,
 )
 from flask import Flask, request, jsonify, Response
+from motor.motor_asyncio import AsyncIOMotorClient
+try:
+    import orjson
+except ImportError:  # optional: speeds up the binary snapshot pack
+    orjson = None
+from pymongo import ASCENDING, DESCENDING, DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateOne, WriteConcern
 from asgiref.wsgi import WsgiToAsgi
 import uvicorn
 import asyncio
@@ -28,6 +50,7 @@ WEBHOOK_URL = "https://vibeliftbot.onrender.com/webhook"
 ADMIN_USER_ID = "1518439839"
 ADMIN_GROUP_ID = os.getenv("ADMIN_GROUP_ID", "-4762253610")  # Default from logs if not set
 PAYSTACK_SECRET_KEY = os.getenv("PAYSTACK_SECRET_KEY")
+PAYSTACK_BASE_URL = os.getenv("PAYSTACK_BASE_URL", "https://api.paystack.co")
 ADMINS = [ADMIN_USER_ID]
 
 # Logging
@@ -47,9 +70,49 @@ RATE_LIMITS = {
     'client': {'limit': 5, 'window': 60, 'is_signup_action': True},
     'engager': {'limit': 5, 'window': 60, 'is_signup_action': True},
     'help': {'limit': 10, 'window': 60},
-    'admin': {'limit': 10, 'window': 60}
+    'admin': {'limit': 10, 'window': 60},
+    'pay': {'limit': 5, 'window': 60},
+    'tasks': {'limit': 10, 'window': 60},
+    'withdraw': {'limit': 3, 'window': 60}
 }
-user_rate_limits = {}
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100_000))
+
+class RateLimiter:
+    """Token buckets keyed by (user_id, action): O(1) per check, bounded memory.
+
+    A bucket holds up to `limit` tokens and refills at limit/window per second,
+    so each key is just (tokens, last_seen). Keys sit in last-use order; every
+    check evicts from the idle end, since a key untouched for a whole window
+    has a full bucket and is the same as no key at all.
+    """
+
+    def __init__(self, limits: dict, max_keys: int):
+        self.limits = limits
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+
+    def allow(self, user_id: str, action: str) -> bool:
+        rule = self.limits[action]
+        now = time.monotonic()
+        key = (user_id, action)
+        bucket = self.buckets.pop(key, None)
+        if bucket is None:
+            tokens = rule['limit']
+        else:
+            tokens = min(rule['limit'], bucket[0] + (now - bucket[1]) * rule['limit'] / rule['window'])
+        allowed = tokens >= 1
+        self.buckets[key] = (tokens - 1 if allowed else tokens, now)
+        self._evict(now)
+        return allowed
+
+    def _evict(self, now: float) -> None:
+        while self.buckets:
+            (user_id, action), (_, last_seen) = next(iter(self.buckets.items()))
+            if len(self.buckets) <= self.max_keys and now - last_seen < self.limits[action]['window']:
+                break
+            self.buckets.popitem(last=False)
+
+rate_limiter = RateLimiter(RATE_LIMITS, RATE_LIMIT_MAX_KEYS)
 
 # Package limits
 package_limits = {
@@ -92,29 +155,993 @@ daily_tips = [
     "🎯 Consistency is key—post daily to grow your crew!"
 ]
 
+# Persistence
+# State lives in memory; disk holds one shard per top-level collection, each a
+# snapshot plus an append-only journal of per-record deltas. load_users() replays
+# the journals over the snapshots and the compactor periodically folds them back.
+# STORAGE_BACKEND picks the StateStore: "journal" (sharded files, default), "sqlite" or "mongo".
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "journal")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "vibelift.db")
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+MONGODB_DB = os.getenv("MONGODB_DB", "vibelift")
+USERS_DATA_DIR = os.getenv("USERS_DATA_DIR", "data")
+# "binary" keeps the journal store's snapshots in one memory-mapped pack decoded lazily at startup.
+SNAPSHOT_FORMAT = os.getenv("SNAPSHOT_FORMAT", "json")
+# Legacy single-file layout, migrated into shards on first start.
+USERS_SNAPSHOT_FILE = os.getenv("USERS_SNAPSHOT_FILE", "users.json")
+USERS_JOURNAL_FILE = os.getenv("USERS_JOURNAL_FILE", "users.journal")
+JOURNAL_COMPACT_BYTES = int(os.getenv("JOURNAL_COMPACT_BYTES", 4 * 1024 * 1024))
+JOURNAL_COMPACT_INTERVAL = int(os.getenv("JOURNAL_COMPACT_INTERVAL", 300))
+# Write-behind: save_users() only marks the state dirty; the flusher persists it
+# every USERS_FLUSH_INTERVAL seconds, or sooner once USERS_FLUSH_THRESHOLD records pile up.
+USERS_FLUSH_INTERVAL = float(os.getenv("USERS_FLUSH_INTERVAL", 2.0))
+USERS_FLUSH_THRESHOLD = int(os.getenv("USERS_FLUSH_THRESHOLD", 500))
+# Serialization and file I/O run on this single thread so saves never block the
+# event loop, and journal appends stay in submission order.
+storage_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vibelift-storage")
+SLOW_FLUSH_MS = float(os.getenv("SLOW_FLUSH_MS", 250))
+flush_timings = deque(maxlen=1000)  # (ms spent on the loop, ms until durable) per flush
+flush_stats = {'flushes': 0, 'records': 0, 'bytes': 0}
+users_store = None
+users_dirty = False
+users_flush_wakeup = asyncio.Event()
+
+class TrackedDict(dict):
+    """A users collection that remembers which keys were touched since the last save.
+
+    Reads count as touches: handlers mutate nested records in place
+    (users['engagers'][uid]['xp'] += 10), so any record handed out may have changed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.touched = set()
+        self.replaced = False
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.touched.add(key)
+        return value
+
+    def get(self, key, default=None):
+        if key in self:
+            self.touched.add(key)
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self.touched.add(key)
+        return super().setdefault(key, default)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.touched.add(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.touched.add(key)
+
+    def pop(self, key, *default):
+        self.touched.add(key)
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, value = super().popitem()
+        self.touched.add(key)
+        return key, value
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        super().clear()
+        self.touched.clear()
+        self.replaced = True
+
+class LazyCollection:
+    """Placeholder for a collection that is decoded the first time a handler asks for it."""
+
+    def __init__(self, loader):
+        self.loader = loader
+
+class UserState(dict):
+    """The top-level users mapping; every dict collection is wrapped in a TrackedDict.
+
+    LazyCollection values are materialized on first access. Iterating the raw
+    mapping (as collect_user_changes does) leaves them undecoded.
+    """
+
+    def __init__(self, data: dict = None):
+        super().__init__()
+        for name, collection in (data or {}).items():
+            super().__setitem__(name, TrackedDict(collection) if isinstance(collection, dict) else collection)
+
+    def __getitem__(self, name):
+        collection = super().__getitem__(name)
+        if isinstance(collection, LazyCollection):
+            collection = TrackedDict(collection.loader())
+            super().__setitem__(name, collection)
+        return collection
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def __setitem__(self, name, collection):
+        if isinstance(collection, dict) and not isinstance(collection, TrackedDict):
+            collection = TrackedDict(collection)
+        if isinstance(collection, TrackedDict):
+            collection.replaced = True
+        super().__setitem__(name, collection)
+
+def collect_user_changes(state: dict) -> list:
+    """Drain touched keys from every collection into journal records.
+
+    Values are deep-copied so the writer thread serializes a consistent
+    snapshot while handlers keep mutating the live records.
+    """
+    records = []
+    for name, collection in state.items():
+        if not isinstance(collection, TrackedDict):
+            continue
+        if collection.replaced:
+            records.append({'c': name, 'v': copy.deepcopy(dict(collection))})
+        else:
+            for key in collection.touched:
+                if dict.__contains__(collection, key):
+                    records.append({'c': name, 'k': key, 'v': copy.deepcopy(dict.__getitem__(collection, key))})
+                else:
+                    records.append({'c': name, 'k': key, 'd': 1})
+        collection.touched.clear()
+        collection.replaced = False
+    return records
+
+def restore_user_changes(state: dict, records: list) -> None:
+    """Mark drained records as touched again, so a failed write is retried by the next flush."""
+    for record in records:
+        collection = dict.get(state, record['c'])
+        if not isinstance(collection, TrackedDict):
+            continue
+        if 'k' in record:
+            collection.touched.add(record['k'])
+        else:
+            collection.replaced = True
+
+def apply_journal_record(state: dict, record: dict) -> None:
+    name = record['c']
+    if 'k' not in record:
+        state[name] = record['v']
+    elif record.get('d'):
+        state.setdefault(name, {}).pop(record['k'], None)
+    else:
+        state.setdefault(name, {})[record['k']] = record['v']
+
+class JournalStore:
+    """Snapshot file plus an append-only JSON-lines journal of record deltas.
+
+    Every method does blocking file I/O and is meant to run on storage_executor.
+    Compaction moves the live journal aside (rotate) and folds it into the
+    snapshot on another thread (fold), so appends never wait on a full rewrite.
+    """
+
+    def __init__(self, snapshot_path: str, journal_path: str):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.rotated_path = f"{journal_path}.old"
+        self._journal = None
+
+    def _read_snapshot(self) -> dict:
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _replay(self, state: dict, path: str) -> int:
+        replayed = 0
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Journals written before torn tails were cut off on open can
+                        # hold a torn line with good records after it; keep going.
+                        logger.warning(f"Skipping torn journal record in {path}")
+                        continue
+                    apply_journal_record(state, record)
+                    replayed += 1
+        except FileNotFoundError:
+            pass
+        return replayed
+
+    def load(self) -> dict:
+        state = self._read_snapshot()
+        replayed = self._replay(state, self.rotated_path) + self._replay(state, self.journal_path)
+        logger.info(f"Loaded {self.snapshot_path} and replayed {replayed} journal records")
+        return state
+
+    def _cut_torn_tail(self) -> None:
+        """Truncate the journal back to its last complete line.
+
+        A crash mid-append leaves a record without its newline; appending after it
+        would glue the next record onto the torn one and lose both on replay.
+        """
+        try:
+            with open(self.journal_path, 'rb+') as f:
+                end = f.seek(0, os.SEEK_END)
+                keep = end
+                while keep > 0:
+                    step = min(4096, keep)
+                    f.seek(keep - step)
+                    newline = f.read(step).rfind(b'\n')
+                    if newline != -1:
+                        keep = keep - step + newline + 1
+                        break
+                    keep -= step
+                if keep < end:
+                    logger.warning(f"Cutting {end - keep} bytes of torn record off {self.journal_path}")
+                    f.truncate(keep)
+        except FileNotFoundError:
+            pass
+
+    def write(self, records: list, durable: bool = False) -> int:
+        """Append records to the journal; returns the number of bytes written."""
+        payload = ''.join(json.dumps(r, separators=(',', ':')) + '\n' for r in records)
+        if payload:
+            if self._journal is None:
+                self._cut_torn_tail()
+                self._journal = open(self.journal_path, 'a')
+            self._journal.write(payload)
+            self._journal.flush()
+        if durable and self._journal is not None:
+            os.fsync(self._journal.fileno())
+        return len(payload)
+
+    def journal_size(self) -> int:
+        try:
+            return os.path.getsize(self.journal_path)
+        except FileNotFoundError:
+            return 0
+
+    def rotate(self) -> bool:
+        """Move the live journal aside for folding; False when there is nothing to fold."""
+        if os.path.exists(self.rotated_path):
+            # A previous fold never finished; fold that one first.
+            return True
+        if self.journal_size() == 0:
+            return False
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        os.replace(self.journal_path, self.rotated_path)
+        return True
+
+    def write_snapshot(self, state: dict) -> None:
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    def fold(self) -> None:
+        state = self._read_snapshot()
+        self._replay(state, self.rotated_path)
+        self.write_snapshot(state)
+        # Replaying records the snapshot already holds is a no-op, so a crash
+        # between the replace and the remove loses nothing.
+        os.remove(self.rotated_path)
+
+class StateStore(abc.ABC):
+    """Where the users state is persisted.
+
+    Handlers only ever touch the in-memory users dict; load_users() fills it from
+    load() and flush_users() hands write() the records drained from it, so every
+    backend runs the same handlers unchanged. Records use the journal format:
+    {'c': collection, 'k': key, 'v': value}, 'd': 1 for deletes, no 'k' for a
+    whole-collection replace.
+    """
+
+    @abc.abstractmethod
+    async def load(self) -> dict:
+        """The whole state as {collection: {key: value}}."""
+
+    @abc.abstractmethod
+    async def write(self, records: list, durable: bool = False) -> int:
+        """Persist the records; returns how many were written."""
+
+    async def compact(self) -> None:
+        pass
+
+    def metrics(self) -> dict:
+        return {}
+
+    async def close(self) -> None:
+        pass
+
+# Binary snapshot pack: b'VLS1', a little-endian u32 header length, a JSON header
+# {collection: [offset, length]} and then each collection's JSON bytes back to back.
+# orjson writes and reads it when installed; the bytes are plain JSON either way.
+PACK_MAGIC = b'VLS1'
+
+def dumps_bytes(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':')).encode()
+
+def loads_bytes(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(bytes(data))
+
+def write_snapshot_pack(path: str, payloads: dict) -> None:
+    """Write {collection: encoded bytes} as a pack file, atomically."""
+    index, offset = {}, 0
+    for name, payload in payloads.items():
+        index[name] = [offset, len(payload)]
+        offset += len(payload)
+    header = json.dumps(index, separators=(',', ':')).encode()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PACK_MAGIC + struct.pack('<I', len(header)) + header)
+        for payload in payloads.values():
+            f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class SnapshotPack:
+    """A memory-mapped pack; only the header is parsed up front, collections decode on demand."""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:4] != PACK_MAGIC:
+            raise ValueError(f"{path} is not a snapshot pack")
+        header_length = struct.unpack('<I', self._mmap[4:8])[0]
+        self.index = json.loads(self._mmap[8:8 + header_length])
+        self._base = 8 + header_length
+
+    def raw(self, name: str) -> bytes:
+        offset, length = self.index[name]
+        return self._mmap[self._base + offset:self._base + offset + length]
+
+    def decode(self, name: str) -> dict:
+        if name not in self.index:
+            return {}
+        offset, length = self.index[name]
+        with memoryview(self._mmap)[self._base + offset:self._base + offset + length] as view:
+            return loads_bytes(view)
+
+    def close(self) -> None:
+        self._mmap.close()
+
+class ShardedJournalStore(StateStore):
+    """One JournalStore per top-level collection, so a save only touches the shards that changed.
+
+    Shard files live in data_dir as <collection>.json / <collection>.journal. With
+    snapshot_format='binary' the per-collection snapshots are replaced by a single
+    memory-mapped pack (snapshot.vls) and collections are decoded lazily on first use;
+    compaction then re-encodes only the collections whose journals it folds.
+    """
+
+    def __init__(self, data_dir: str, legacy_snapshot: str = None, legacy_journal: str = None,
+                 snapshot_format: str = 'json'):
+        self.data_dir = data_dir
+        self.legacy_snapshot = legacy_snapshot
+        self.legacy_journal = legacy_journal
+        self.snapshot_format = snapshot_format
+        self.pack_path = os.path.join(data_dir, 'snapshot.vls')
+        self.pack = None
+        self.shards = {}
+
+    def shard(self, name: str) -> JournalStore:
+        if name not in self.shards:
+            self.shards[name] = JournalStore(
+                os.path.join(self.data_dir, f"{name}.json"),
+                os.path.join(self.data_dir, f"{name}.journal"),
+            )
+        return self.shards[name]
+
+    def shard_names(self) -> list:
+        names = set()
+        for filename in os.listdir(self.data_dir):
+            for suffix in ('.json', '.journal', '.journal.old'):
+                if filename.endswith(suffix):
+                    names.add(filename[:-len(suffix)])
+        return sorted(names)
+
+    def load_shard(self, name: str) -> dict:
+        return self.shard(name).load().get(name, {})
+
+    def migrate_legacy(self) -> list:
+        """Split a legacy single-file users.json (+ journal) into shards; returns the shard names."""
+        os.makedirs(self.data_dir, exist_ok=True)
+        legacy_files = [path for path in (self.legacy_snapshot, self.legacy_journal) if path]
+        if self.shard_names() or not any(os.path.exists(path) for path in legacy_files):
+            return self.shard_names()
+        state = JournalStore(self.legacy_snapshot, self.legacy_journal).load()
+        for name, collection in state.items():
+            self.shard(name).write_snapshot({name: collection})
+        logger.info(f"Migrated {self.legacy_snapshot} into {len(state)} shards under {self.data_dir}")
+        return self.shard_names()
+
+    def _write(self, records: list, durable: bool) -> int:
+        by_shard = {}
+        for record in records:
+            by_shard.setdefault(record['c'], []).append(record)
+        written = sum(self.shard(name).write(batch, durable) for name, batch in by_shard.items())
+        if durable and not by_shard:
+            for shard in self.shards.values():
+                shard.write([], durable=True)
+        return written
+
+    def load_packed(self, name: str) -> dict:
+        state = {name: self.pack.decode(name) if self.pack else {}}
+        shard = self.shard(name)
+        shard._replay(state, shard.rotated_path)
+        shard._replay(state, shard.journal_path)
+        return state[name]
+
+    def _fold_pack(self, names: list) -> None:
+        payloads = {}
+        for name in sorted(set(self.pack.index if self.pack else ()) | set(names)):
+            if name in names:
+                state = {name: self.pack.decode(name) if self.pack else {}}
+                self.shard(name)._replay(state, self.shard(name).rotated_path)
+                payloads[name] = dumps_bytes(state[name])
+            else:
+                # Untouched collections are copied byte for byte, never decoded.
+                payloads[name] = self.pack.raw(name)
+        write_snapshot_pack(self.pack_path, payloads)
+
+    async def load(self) -> dict:
+        loop = asyncio.get_running_loop()
+        names = await loop.run_in_executor(storage_executor, self.migrate_legacy)
+        if self.snapshot_format == 'binary' and os.path.exists(self.pack_path):
+            self.pack = SnapshotPack(self.pack_path)
+            names = sorted(set(names) | set(self.pack.index))
+            for name in names:
+                self.shard(name)  # so compaction sees journals of collections nobody decoded yet
+            return {name: LazyCollection(functools.partial(self.load_packed, name)) for name in names}
+        # Shards are independent files, so read them side by side on the default pool.
+        collections = await asyncio.gather(
+            *(loop.run_in_executor(None, self.load_shard, name) for name in names)
+        )
+        state = dict(zip(names, collections))
+        if self.snapshot_format == 'binary':
+            # First start in binary mode: pack what we just read from the JSON shards.
+            payloads = {name: dumps_bytes(collection) for name, collection in state.items()}
+            await loop.run_in_executor(storage_executor, write_snapshot_pack, self.pack_path, payloads)
+            self.pack = SnapshotPack(self.pack_path)
+            logger.info(f"Packed {len(payloads)} collections into {self.pack_path}")
+        return state
+
+    async def write(self, records: list, durable: bool = False) -> int:
+        return await asyncio.get_running_loop().run_in_executor(storage_executor, self._write, records, durable)
+
+    async def compact_pack(self) -> None:
+        loop = asyncio.get_running_loop()
+        rotated = []
+        for name, shard in list(self.shards.items()):
+            if shard.journal_size() >= JOURNAL_COMPACT_BYTES or os.path.exists(shard.rotated_path):
+                if await loop.run_in_executor(storage_executor, shard.rotate):
+                    rotated.append(name)
+        if not rotated:
+            return
+        started = time.perf_counter()
+        await loop.run_in_executor(None, self._fold_pack, rotated)
+        # Swap to the new pack before dropping the rotated journals: a collection
+        # decoded in between still sees every record, and replaying twice is harmless.
+        old_pack, self.pack = self.pack, SnapshotPack(self.pack_path)
+        if old_pack is not None:
+            old_pack.close()
+        for name in rotated:
+            os.remove(self.shard(name).rotated_path)
+        logger.info(f"Folded {', '.join(rotated)} into {self.pack_path} in {time.perf_counter() - started:.2f}s")
+
+    async def compact(self) -> None:
+        if self.snapshot_format == 'binary':
+            try:
+                await self.compact_pack()
+            except Exception as e:
+                logger.error(f"Snapshot pack compaction failed: {e}", exc_info=True)
+            return
+        loop = asyncio.get_running_loop()
+        for name, shard in list(self.shards.items()):
+            if shard.journal_size() < JOURNAL_COMPACT_BYTES and not os.path.exists(shard.rotated_path):
+                continue
+            try:
+                if not await loop.run_in_executor(storage_executor, shard.rotate):
+                    continue
+                started = time.perf_counter()
+                # Folding reads and rewrites files only, never the live users dict.
+                await loop.run_in_executor(None, shard.fold)
+                logger.info(f"Folded {name} journal into a fresh snapshot in {time.perf_counter() - started:.2f}s")
+            except Exception as e:
+                logger.error(f"Journal compaction failed for {name}: {e}", exc_info=True)
+
+    def metrics(self) -> dict:
+        return {'journal_bytes': sum(shard.journal_size() for shard in self.shards.values())}
+
+    async def close(self) -> None:
+        if self.pack is not None:
+            self.pack.close()
+            self.pack = None
+
+# Table layout for SQLiteStore: collection -> (table, key column, indexed columns, fixed columns).
+# Every row also keeps the full record as JSON in `doc`; the extra columns only exist to be indexed.
+# Collections not listed here land in the generic kv table.
+SQLITE_COLLECTIONS = {
+    'clients': ('clients', 'user_id', {'step': lambda d: d.get('step'), 'order_id': lambda d: d.get('order_id')}, {}),
+    'engagers': ('engagers', 'user_id', {
+        'xp': lambda d: d.get('xp', 0),
+        'awaiting_payout': lambda d: int(bool(d.get('awaiting_payout'))),
+    }, {}),
+    'pending_orders': ('orders', 'order_id', {'client_id': lambda d: str(d.get('client_id'))}, {'status': 'pending'}),
+    'active_orders': ('orders', 'order_id', {'client_id': lambda d: str(d.get('client_id'))}, {'status': 'active'}),
+    'pending_task_completions': ('completions', 'completion_id', {
+        'engager_id': lambda d: d.get('engager_id'),
+        'task_id': lambda d: d.get('task_id'),
+    }, {}),
+    'referrals': ('referrals', 'user_id', {'referred_by': lambda d: d.get('referred_by')}, {}),
+}
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clients (user_id TEXT PRIMARY KEY, step TEXT, order_id TEXT, doc TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_clients_step ON clients(step);
+CREATE TABLE IF NOT EXISTS engagers (user_id TEXT PRIMARY KEY, xp INTEGER, awaiting_payout INTEGER, doc TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_engagers_xp ON engagers(xp);
+CREATE INDEX IF NOT EXISTS idx_engagers_payout ON engagers(awaiting_payout) WHERE awaiting_payout = 1;
+CREATE TABLE IF NOT EXISTS orders (order_id TEXT PRIMARY KEY, status TEXT NOT NULL, client_id TEXT, doc TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status);
+CREATE INDEX IF NOT EXISTS idx_orders_client ON orders(client_id);
+CREATE TABLE IF NOT EXISTS completions (completion_id TEXT PRIMARY KEY, engager_id TEXT, task_id TEXT, doc TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_completions_engager ON completions(engager_id);
+CREATE TABLE IF NOT EXISTS referrals (user_id TEXT PRIMARY KEY, referred_by TEXT, doc TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_referrals_referred_by ON referrals(referred_by);
+CREATE TABLE IF NOT EXISTS kv (collection TEXT NOT NULL, key TEXT NOT NULL, doc TEXT NOT NULL, PRIMARY KEY (collection, key));
+"""
+
+class SQLiteStore(StateStore):
+    """Embedded SQLite backend: indexed tables, WAL mode, one transaction per flush."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SQLITE_SCHEMA)
+        return self._conn
+
+    @staticmethod
+    def _layout(name: str) -> tuple:
+        return SQLITE_COLLECTIONS.get(name, ('kv', 'key', {}, {'collection': name}))
+
+    def _load(self) -> dict:
+        conn = self._connect()
+        state = {name: {} for name in SQLITE_COLLECTIONS}
+        for name, (table, key_column, _, fixed) in SQLITE_COLLECTIONS.items():
+            where = ' AND '.join(f"{column} = ?" for column in fixed) or '1'
+            for key, doc in conn.execute(f"SELECT {key_column}, doc FROM {table} WHERE {where}", tuple(fixed.values())):
+                state[name][key] = json.loads(doc)
+        for name, key, doc in conn.execute("SELECT collection, key, doc FROM kv"):
+            state.setdefault(name, {})[key] = json.loads(doc)
+        return state
+
+    def _upsert(self, conn: sqlite3.Connection, name: str, items: list) -> int:
+        table, key_column, indexed, fixed = self._layout(name)
+        columns = [key_column, *fixed, *indexed, 'doc']
+        rows = [
+            (key, *fixed.values(), *(extract(value) for extract in indexed.values()), json.dumps(value, separators=(',', ':')))
+            for key, value in items
+        ]
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            rows,
+        )
+        return sum(len(row[-1]) for row in rows)
+
+    def _delete(self, conn: sqlite3.Connection, name: str, keys: list = None) -> None:
+        table, key_column, _, fixed = self._layout(name)
+        # The fixed columns scope a delete to this collection, e.g. dropping an order
+        # from pending_orders must not remove the row it just became in active_orders.
+        conditions = [f"{column} = ?" for column in fixed]
+        params = list(fixed.values())
+        if keys is None:
+            conn.execute(f"DELETE FROM {table} WHERE {' AND '.join(conditions) or '1'}", params)
+            return
+        conditions.append(f"{key_column} = ?")
+        conn.executemany(f"DELETE FROM {table} WHERE {' AND '.join(conditions)}", [(*params, key) for key in keys])
+
+    def _write(self, records: list, durable: bool) -> int:
+        if not records:
+            return 0
+        conn = self._connect()
+        written = 0
+        if durable:
+            conn.execute("PRAGMA synchronous=FULL")
+        try:
+            conn.execute("BEGIN")
+            # Apply in journal order, batching consecutive records of the same kind.
+            batch_name, batch_op, batch = None, None, []
+            for record in records + [None]:
+                if record is not None:
+                    op = 'replace' if 'k' not in record else 'delete' if record.get('d') else 'upsert'
+                    if (record['c'], op) == (batch_name, batch_op) and op != 'replace':
+                        batch.append(record)
+                        continue
+                if batch_op == 'replace':
+                    self._delete(conn, batch_name)
+                    written += self._upsert(conn, batch_name, list(batch[0]['v'].items()))
+                elif batch_op == 'delete':
+                    self._delete(conn, batch_name, [r['k'] for r in batch])
+                elif batch_op == 'upsert':
+                    written += self._upsert(conn, batch_name, [(r['k'], r['v']) for r in batch])
+                if record is not None:
+                    batch_name, batch_op, batch = record['c'], op, [record]
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            if durable:
+                conn.execute("PRAGMA synchronous=NORMAL")
+        return written
+
+    def _checkpoint(self) -> None:
+        self._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    async def load(self) -> dict:
+        return await asyncio.get_running_loop().run_in_executor(storage_executor, self._load)
+
+    async def write(self, records: list, durable: bool = False) -> int:
+        return await asyncio.get_running_loop().run_in_executor(storage_executor, self._write, records, durable)
+
+    async def compact(self) -> None:
+        await asyncio.get_running_loop().run_in_executor(storage_executor, self._checkpoint)
+
+    def metrics(self) -> dict:
+        try:
+            return {'wal_bytes': os.path.getsize(f"{self.path}-wal")}
+        except FileNotFoundError:
+            return {'wal_bytes': 0}
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await asyncio.get_running_loop().run_in_executor(storage_executor, self._conn.close)
+            self._conn = None
+
+# Document layout for MongoStore: collection -> (mongo collection, fixed fields).
+# Records are stored flat with the users key as _id; collections not listed here
+# go to the kv collection as {'_id': 'name:key', '_collection', '_key', 'value'}.
+MONGO_COLLECTIONS = {
+    'clients': ('clients', {}),
+    'engagers': ('engagers', {}),
+    'pending_orders': ('orders', {'_status': 'pending'}),
+    'active_orders': ('orders', {'_status': 'active'}),
+    'pending_task_completions': ('completions', {}),
+    'referrals': ('referrals', {}),
+}
+# Engager fields written with $inc so concurrent writers never lose an update.
+MONGO_COUNTER_FIELDS = ('earnings', 'xp', 'signup_bonus', 'balance', 'task_count')
+
+class MongoStore(StateStore):
+    """MongoDB backend on motor: per-document upserts, $inc for engager counters.
+
+    Pass client= to run against an in-process stand-in; MONGODB_URI=mongomock://
+    does that with mongomock-motor so the bot and its checks work offline.
+    """
+
+    def __init__(self, uri: str = None, db_name: str = None, client=None):
+        if client is None:
+            if uri and uri.startswith('mongomock://'):
+                from mongomock_motor import AsyncMongoMockClient
+                client = AsyncMongoMockClient()
+            else:
+                client = AsyncIOMotorClient(uri)
+        self.client = client
+        self.db = client.get_database(db_name or MONGODB_DB)
+        self.durable_db = client.get_database(db_name or MONGODB_DB, write_concern=WriteConcern(w=1, j=True))
+        # Last counter values and field names we wrote per engager, the baseline for $inc/$unset.
+        self._counters = {}
+        self._fields = {}
+        # One write at a time, like the executor-serialized stores: overlapping bulk
+        # writes could land out of order, and an empty durable write must wait
+        # behind the one in flight.
+        self._write_lock = asyncio.Lock()
+
+    @staticmethod
+    def _layout(name: str) -> tuple:
+        return MONGO_COLLECTIONS.get(name, ('kv', {'_collection': name}))
+
+    def _document(self, name: str, key: str, value) -> dict:
+        target, fixed = self._layout(name)
+        if target == 'kv':
+            return {'_id': f"{name}:{key}", **fixed, '_key': key, 'value': value}
+        return {**value, **fixed, '_id': key}
+
+    def _engager_update(self, key: str, value: dict) -> dict:
+        previous = self._counters.get(key)
+        previous_fields = self._fields.get(key, ())
+        counters = {f: value[f] for f in MONGO_COUNTER_FIELDS if isinstance(value.get(f), (int, float))}
+        self._counters[key] = counters
+        self._fields[key] = set(value)
+        if previous is None:
+            return {'$set': self._document('engagers', key, value)}
+        update = {
+            '$set': {f: v for f, v in value.items() if f not in counters or f not in previous},
+            '$inc': {f: counters[f] - previous[f] for f in counters if f in previous and counters[f] != previous[f]},
+            '$unset': {f: '' for f in previous_fields if f not in value},
+        }
+        return {op: fields for op, fields in update.items() if fields}
+
+    async def ensure_indexes(self) -> None:
+        await self.db.orders.create_index([('_status', ASCENDING)])
+        await self.db.orders.create_index([('client_id', ASCENDING)])
+        await self.db.completions.create_index([('engager_id', ASCENDING)])
+        await self.db.engagers.create_index([('awaiting_payout', ASCENDING)])
+        await self.db.engagers.create_index([('xp', DESCENDING)])
+        await self.db.kv.create_index([('_collection', ASCENDING)])
+
+    async def load(self) -> dict:
+        await self.ensure_indexes()
+        state = {name: {} for name in MONGO_COLLECTIONS}
+        for name, (target, fixed) in MONGO_COLLECTIONS.items():
+            async for doc in self.db[target].find(fixed):
+                key = doc.pop('_id')
+                for field in fixed:
+                    doc.pop(field, None)
+                state[name][key] = doc
+        async for doc in self.db.kv.find({}):
+            state.setdefault(doc['_collection'], {})[doc['_key']] = doc['value']
+        self._counters = {
+            key: {f: doc[f] for f in MONGO_COUNTER_FIELDS if isinstance(doc.get(f), (int, float))}
+            for key, doc in state['engagers'].items()
+        }
+        self._fields = {key: set(doc) for key, doc in state['engagers'].items()}
+        return state
+
+    async def write(self, records: list, durable: bool = False) -> int:
+        async with self._write_lock:
+            return await self._write(records, durable)
+
+    async def _write(self, records: list, durable: bool) -> int:
+        ops = {}
+        for record in records:
+            name = record['c']
+            target, fixed = self._layout(name)
+            batch = ops.setdefault(target, [])
+            if 'k' not in record:
+                batch.append(DeleteMany(fixed))
+                if name == 'engagers':
+                    self._counters.clear()
+                    self._fields.clear()
+                for key, value in record['v'].items():
+                    if name == 'engagers':
+                        self._engager_update(key, value)
+                    batch.append(InsertOne(self._document(name, key, value)))
+            elif record.get('d'):
+                doc_id = f"{name}:{record['k']}" if target == 'kv' else record['k']
+                batch.append(DeleteOne({'_id': doc_id, **fixed}))
+                if name == 'engagers':
+                    self._counters.pop(record['k'], None)
+                    self._fields.pop(record['k'], None)
+            elif name == 'engagers':
+                update = self._engager_update(record['k'], record['v'])
+                if update:
+                    batch.append(UpdateOne({'_id': record['k']}, update, upsert=True))
+            else:
+                doc = self._document(name, record['k'], record['v'])
+                batch.append(ReplaceOne({'_id': doc['_id']}, doc, upsert=True))
+        db = self.durable_db if durable else self.db
+        try:
+            for target, batch in ops.items():
+                if batch:
+                    await db[target].bulk_write(batch, ordered=True)
+        except Exception:
+            # Our $inc baselines may no longer match the server; fall back to $set next time.
+            self._counters.clear()
+            self._fields.clear()
+            raise
+        return sum(len(batch) for batch in ops.values())
+
+    async def close(self) -> None:
+        self.client.close()
+
+def create_state_store() -> StateStore:
+    if STORAGE_BACKEND == 'sqlite':
+        return SQLiteStore(SQLITE_PATH)
+    if STORAGE_BACKEND == 'mongo':
+        return MongoStore(MONGODB_URI)
+    return ShardedJournalStore(USERS_DATA_DIR, USERS_SNAPSHOT_FILE, USERS_JOURNAL_FILE, SNAPSHOT_FORMAT)
+
 # Helper functions
 async def load_users() -> dict:
-    try:
-        with open('users.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
+    global users_store
+    users_store = create_state_store()
+    return UserState(await users_store.load())
+
+def count_dirty_records(state: dict) -> int:
+    return sum(
+        len(collection.touched) for collection in state.values()
+        if isinstance(collection, TrackedDict)
+    )
 
 async def save_users() -> None:
-    with open('users.json', 'w') as f:
-        json.dump(users, f, indent=4)
+    """Mark the state dirty; users_flusher() writes it out shortly after."""
+    global users_dirty
+    users_dirty = True
+    if count_dirty_records(users) >= USERS_FLUSH_THRESHOLD:
+        users_flush_wakeup.set()
+
+async def flush_users(durable: bool = True) -> None:
+    """Write every pending change now. Use for payouts and payment confirmations."""
+    global users_dirty
+    users_dirty = False
+    started = time.perf_counter()
+    records = collect_user_changes(users)
+    snapshot_done = time.perf_counter()
+    # Always go through the store, even with no records of our own: a durable
+    # caller must wait behind any background write that already took its changes.
+    try:
+        written = await users_store.write(records, durable)
+    except Exception:
+        restore_user_changes(users, records)
+        users_dirty = True
+        raise
+    if records:
+        record_flush_timing(len(records), written, snapshot_done - started, time.perf_counter() - started)
+
+def record_flush_timing(record_count: int, byte_count: int, loop_seconds: float, total_seconds: float) -> None:
+    flush_timings.append((loop_seconds * 1000, total_seconds * 1000))
+    flush_stats['flushes'] += 1
+    flush_stats['records'] += record_count
+    flush_stats['bytes'] += byte_count
+    if total_seconds * 1000 >= SLOW_FLUSH_MS:
+        logger.warning(
+            f"Slow flush: {record_count} records, {byte_count} bytes, "
+            f"{loop_seconds * 1000:.1f}ms on loop, {total_seconds * 1000:.1f}ms total"
+        )
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def storage_metrics() -> dict:
+    loop_ms = [t[0] for t in flush_timings]
+    total_ms = [t[1] for t in flush_timings]
+    return {
+        **flush_stats,
+        'last_loop_ms': round(loop_ms[-1], 2) if loop_ms else 0.0,
+        'last_total_ms': round(total_ms[-1], 2) if total_ms else 0.0,
+        'p50_total_ms': round(percentile(total_ms, 50), 2),
+        'p99_total_ms': round(percentile(total_ms, 99), 2),
+        'p99_loop_ms': round(percentile(loop_ms, 99), 2),
+        'backend': STORAGE_BACKEND,
+        **(users_store.metrics() if users_store else {}),
+    }
+
+async def users_flusher() -> None:
+    while True:
+        try:
+            await asyncio.wait_for(users_flush_wakeup.wait(), timeout=USERS_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        users_flush_wakeup.clear()
+        if not users_dirty:
+            continue
+        try:
+            await flush_users(durable=False)
+        except Exception as e:
+            logger.error(f"Background flush failed: {e}", exc_info=True)
+
+async def compact_state() -> None:
+    try:
+        await users_store.compact()
+    except Exception as e:
+        logger.error(f"State store compaction failed: {e}", exc_info=True)
+
+def synthetic_state(engager_count: int) -> dict:
+    clients = {str(2_000_000_000 + i): {'step': 'active', 'platform': 'instagram', 'order_id': str(uuid.UUID(int=i))}
+               for i in range(engager_count // 10)}
+    return {
+        'clients': clients,
+        'engagers': {
+            str(1_000_000_000 + i): {
+                'earnings': i % 900, 'signup_bonus': 500, 'xp': i % 5000, 'level': 1,
+                'claims': [], 'awaiting_payout': False, 'current_task': None,
+            }
+            for i in range(engager_count)
+        },
+        'pending_orders': {
+            client['order_id']: {'client_id': uid, 'platform': 'instagram', 'handle_or_url': '@someone',
+                                 'follows': 25, 'likes': 50, 'comments': 20, 'price': 8000}
+            for uid, client in list(clients.items())[:100]
+        },
+        'active_orders': {},
+        'referrals': {str(1_000_000_000 + i): {'referred_by': str(1_000_000_000 + i + 1)} for i in range(engager_count // 5)},
+        'daily_tip': {str(1_000_000_000 + i): 16 for i in range(engager_count)},
+    }
+
+def benchmark_snapshot_formats(sizes: list) -> None:
+    """Compare main()'s startup with the legacy users.json against the binary pack.
+
+    Both ready columns time everything main() does before the bot takes updates:
+    loading the state, adding missing collections and rebuilding the in-memory
+    indexes. The last column is the one-off cost the pack defers to the first
+    engager lookup: decoding engagers and building the indexes derived from them.
+    """
+    async def load_pack(data_dir: str) -> tuple:
+        started = time.perf_counter()
+        state = UserState(await ShardedJournalStore(data_dir, snapshot_format='binary').load())
+        return state, time.perf_counter() - started
+
+    print(f"{'engagers':>10} {'json MB':>8} {'json ready s':>13} {'pack MB':>8} {'pack load ms':>13} "
+          f"{'index rebuild s':>16} {'pack ready s':>13} {'first engager use s':>20}")
+    for size in sizes:
+        state = synthetic_state(size)
+        with tempfile.TemporaryDirectory() as workdir:
+            json_path = os.path.join(workdir, 'users.json')
+            with open(json_path, 'w') as f:
+                json.dump(state, f, indent=4)  # what save_users() used to write
+            data_dir = os.path.join(workdir, 'data')
+            os.makedirs(data_dir)
+            pack_path = os.path.join(data_dir, 'snapshot.vls')
+            write_snapshot_pack(pack_path, {name: dumps_bytes(c) for name, c in state.items()})
+            del state
+            started = time.perf_counter()
+            with open(json_path, 'r') as f:
+                loaded = UserState(json.load(f))
+            ensure_collections(loaded)
+            rebuild_indexes(loaded)
+            json_seconds = time.perf_counter() - started
+            del loaded
+            loaded, load_seconds = asyncio.run(load_pack(data_dir))
+            started = time.perf_counter()
+            ensure_collections(loaded)
+            rebuild_indexes(loaded)
+            rebuild_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            task_index.has_claimed('1000000000', '')
+            len(payout_queue)
+            leaderboard_index.rank('1000000000')
+            first_use_seconds = time.perf_counter() - started
+            print(
+                f"{size:>10} {os.path.getsize(json_path) / 1e6:>8.1f} {json_seconds:>13.3f} "
+                f"{os.path.getsize(pack_path) / 1e6:>8.1f} {load_seconds * 1000:>13.1f} "
+                f"{rebuild_seconds:>16.3f} {load_seconds + rebuild_seconds:>13.3f} {first_use_seconds:>20.3f}"
+            )
+
+async def migrate_to_sqlite(source: str = None, db_path: str = None) -> None:
+    """Import a users.json (plus its journal) or a shard directory into a SQLite database."""
+    source = source or USERS_SNAPSHOT_FILE
+    db_path = db_path or SQLITE_PATH
+    if os.path.isdir(source):
+        state = await ShardedJournalStore(source).load()
+    else:
+        journal_path = f"{os.path.splitext(source)[0]}.journal"
+        state = await asyncio.get_running_loop().run_in_executor(
+            storage_executor, JournalStore(source, journal_path).load
+        )
+    legacy_tasks = state.pop('tasks', None)
+    if legacy_tasks:
+        # Per-unit task records from before counters; the orders' counters replace them.
+        logger.info(f"Skipping {len(legacy_tasks)} legacy task records")
+    store = SQLiteStore(db_path)
+    await store.write([{'c': name, 'v': collection} for name, collection in state.items()], durable=True)
+    await store.close()
+    for name, collection in state.items():
+        logger.info(f"Imported {len(collection)} {name} into {db_path}")
 
 def check_rate_limit(user_id: str, action: str, is_signup_action: bool = False) -> bool:
-    current_time = time.time()
-    user_key = f"{user_id}_{action}"
-    if user_key not in user_rate_limits:
-        user_rate_limits[user_key] = []
-    user_timestamps = user_rate_limits[user_key]
-    user_timestamps[:] = [t for t in user_timestamps if current_time - t < RATE_LIMITS[action]['window']]
-    if len(user_timestamps) >= RATE_LIMITS[action]['limit']:
-        return False
-    user_timestamps.append(current_time)
-    return True
+    return rate_limiter.allow(user_id, action)
 
 def generate_admin_code() -> str:
     return str(uuid.uuid4())[:8]
@@ -140,6 +1167,563 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         except Exception as e:
             logger.warning(f"Failed to send error message: {e}")
 
+# Cursor pagination
+# Long lists (/tasks and the admin pickers) are shown a page at a time. Each list
+# keeps its keys in a CursorIndex sorted by position: an insertion sequence
+# number, or a short tuple of ints for ranked lists. A page cursor is the
+# position at the page edge, so page callbacks stay a few bytes long and
+# building a page bisects to the cursor instead of walking the whole collection.
+PICKER_PAGE_SIZE = int(os.getenv("PICKER_PAGE_SIZE", 10))
+
+class CursorIndex:
+    def __init__(self, keys=()):
+        self.positions = []
+        self.keys = []
+        self.position_of = {}
+        self.counter = itertools.count(1)
+        for key in keys:
+            self.add(key)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self.position_of
+
+    def add(self, key: str, position=None):
+        """Append key (or slot it in at a given position); returns its position."""
+        if key in self.position_of:
+            return self.position_of[key]
+        position = next(self.counter) if position is None else position
+        i = bisect.bisect_right(self.positions, position)
+        self.positions.insert(i, position)
+        self.keys.insert(i, key)
+        self.position_of[key] = position
+        return position
+
+    def discard(self, key: str) -> None:
+        position = self.position_of.pop(key, None)
+        if position is not None:
+            i = bisect.bisect_left(self.positions, position)
+            del self.positions[i]
+            del self.keys[i]
+
+    def move(self, key: str, position) -> None:
+        """Re-rank key in O(log n) lookups, e.g. when an order's priority changes."""
+        if self.position_of.get(key) != position:
+            self.discard(key)
+            self.add(key, position)
+
+    def first(self):
+        return self.keys[0] if self.keys else None
+
+    def key_at(self, position):
+        i = bisect.bisect_left(self.positions, position)
+        return self.keys[i] if i < len(self.positions) and self.positions[i] == position else None
+
+    def iter_after(self, cursor=None):
+        start = 0 if cursor is None else bisect.bisect_right(self.positions, cursor)
+        for i in range(start, len(self.positions)):
+            yield self.positions[i], self.keys[i]
+
+    def iter_before(self, cursor):
+        for i in range(bisect.bisect_left(self.positions, cursor) - 1, -1, -1):
+            yield self.positions[i], self.keys[i]
+
+def cursor_page(index: CursorIndex, cursor=None, backwards: bool = False,
+                size: int = PICKER_PAGE_SIZE, keep=None) -> tuple:
+    """The page after (or before) cursor as ([(position, key), ...], has_prev, has_next)."""
+    def scan(items):
+        return (item for item in items if keep is None or keep(item[1]))
+
+    if cursor is not None and index.positions and type(cursor) is not type(index.positions[0]):
+        cursor = None  # cursor from an older layout of this list, e.g. an old button
+    if backwards and cursor is not None:
+        page = list(itertools.islice(scan(index.iter_before(cursor)), size))[::-1]
+    else:
+        page = list(itertools.islice(scan(index.iter_after(cursor)), size))
+    if not page:
+        # Everything around a stale cursor is gone; fall back to the first page.
+        return cursor_page(index, None, False, size, keep) if cursor is not None else ([], False, False)
+    has_prev = next(scan(index.iter_before(page[0][0])), None) is not None
+    has_next = next(scan(index.iter_after(page[-1][0])), None) is not None
+    return page, has_prev, has_next
+
+def encode_cursor(position) -> str:
+    return '.'.join(map(str, position)) if isinstance(position, tuple) else str(position)
+
+def decode_cursor(text: str):
+    return tuple(int(part) for part in text.split('.')) if '.' in text else int(text)
+
+def page_nav_row(code: str, page: list, has_prev: bool, has_next: bool) -> list:
+    # pg:<code>:<cursor> / pb:<code>:<cursor>: well inside the 64-byte callback_data limit.
+    row = []
+    if has_prev:
+        row.append(InlineKeyboardButton("⬅️ Prev", callback_data=cb('pb', code, page[0][0])))
+    if has_next:
+        row.append(InlineKeyboardButton("Next ➡️", callback_data=cb('pg', code, page[-1][0])))
+    return row
+
+# Admin picker lists, kept in step with the collections they mirror. Their
+# sizes double as the dashboard counters.
+picker_lists = {
+    'pending_orders': CursorIndex(),
+    'completions': CursorIndex(),
+}
+
+class PayoutQueue:
+    """Engagers awaiting payout in request order, with what each is owed and the running total.
+
+    rebuild() only remembers the state: the engagers are scanned on first use, so
+    startup leaves that collection undecoded.
+    """
+
+    def __init__(self):
+        self.source = None  # state still to scan
+        self._index = CursorIndex()
+        self._amounts = {}
+        self._total = 0
+
+    def rebuild(self, state: dict) -> None:
+        self.__init__()
+        self.source = state
+
+    def loaded(self) -> bool:
+        return self.source is None
+
+    def ensure(self) -> bool:
+        """Scan the engagers if that hasn't happened yet; False when this call did the scan."""
+        if self.source is None:
+            return True
+        state, self.source = self.source, None
+        for uid, v in state['engagers'].items():
+            if v.get('awaiting_payout'):
+                self.add(uid, v.get('earnings', 0) + v.get('signup_bonus', 0))
+        return False
+
+    @property
+    def index(self) -> CursorIndex:
+        self.ensure()
+        return self._index
+
+    @property
+    def amounts(self) -> dict:
+        self.ensure()
+        return self._amounts
+
+    @property
+    def total(self) -> int:
+        self.ensure()
+        return self._total
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self.amounts
+
+    def add(self, user_id: str, amount: int) -> None:
+        if user_id not in self.amounts:
+            self._index.add(user_id)
+            self._amounts[user_id] = amount
+            self._total += amount
+
+    def remove(self, user_id: str) -> None:
+        amount = self.amounts.pop(user_id, None)
+        if amount is not None:
+            self._index.discard(user_id)
+            self._total -= amount
+
+    def adjust(self, user_id: str, delta: int) -> None:
+        # Earnings approved while a payout waits are paid out with it. A first-use
+        # scan already read the new earnings, so the delta only applies afterwards.
+        if self.ensure() and user_id in self._amounts:
+            self._amounts[user_id] += delta
+            self._total += delta
+
+payout_queue = PayoutQueue()
+
+def rebuild_picker_lists(state: dict) -> None:
+    picker_lists['pending_orders'] = CursorIndex(state['pending_orders'])
+    picker_lists['completions'] = CursorIndex(state['pending_task_completions'])
+    payout_queue.rebuild(state)
+
+def picker_index(list_name: str) -> CursorIndex:
+    if list_name == 'active_orders':
+        return task_index.open
+    if list_name == 'payouts':
+        return payout_queue.index
+    return picker_lists[list_name]
+
+# Task index
+# Derived from users at startup and kept in step with every order and claim
+# transition, so /tasks never scans the whole backlog. Open orders are indexed
+# in activation order for the admin pickers. The ones with units left to lease
+# form the dispatch queue, ranked by dispatch_rank(): admin-promoted orders
+# first, then oldest, then the most work outstanding.
+# Each engager's claims are a set, read from their record on first use so
+# startup never scans the engagers.
+TASKS_PAGE_SIZE = int(os.getenv("TASKS_PAGE_SIZE", 10))
+
+class TaskIndex:
+    def __init__(self):
+        self.orders = {}
+        self.open = CursorIndex()       # every open order, activation order
+        self.claimable = CursorIndex()  # open orders with capacity, by dispatch rank
+        self.platform_of = {}
+        self.claims = {}                # engager_id -> set of claimed order ids, filled on demand
+        self.state = None
+
+    def rebuild(self, state: dict) -> None:
+        self.__init__()
+        self.state = state
+        self.orders = state['active_orders']
+        for order_id, order in self.orders.items():
+            self.open_order(order_id, order.get('platform', ''), has_capacity(order))
+
+    def claimed(self, engager_id: str) -> set:
+        claims = self.claims.get(engager_id)
+        if claims is None:
+            # dict.get: looking a record up here shouldn't mark it for the next flush.
+            engager = dict.get(self.state['engagers'], engager_id) if self.state is not None else None
+            claims = self.claims[engager_id] = set((engager or {}).get('claims', []))
+        return claims
+
+    def dispatch_rank(self, order_id: str) -> tuple:
+        # Ages are compared by the minute so volume can break ties between orders
+        # activated together; the activation sequence keeps every rank unique.
+        order = self.orders[order_id]
+        return (
+            0 if order.get('priority') else 1,
+            int(order.get('activated_at', 0) // 60),
+            -sum(order_capacity(order).values()),
+            self.open.position_of[order_id],
+        )
+
+    def open_order(self, order_id: str, platform: str, claimable: bool = True) -> None:
+        if order_id in self.platform_of:
+            return
+        self.platform_of[order_id] = platform
+        self.orders[order_id].setdefault('activated_at', time.time())
+        self.open.add(order_id)
+        if claimable:
+            self.resume(order_id)
+
+    def close_order(self, order_id: str) -> None:
+        if order_id in self.platform_of:
+            self.pause(order_id)
+            self.open.discard(order_id)
+            del self.platform_of[order_id]
+
+    def pause(self, order_id: str) -> None:
+        """Hide an order from /tasks while every unit is leased or under review."""
+        if order_id in self.platform_of:
+            self.claimable.discard(order_id)
+
+    def resume(self, order_id: str) -> None:
+        """(Re)queue an order at its current rank; also used after priority or volume changes."""
+        if order_id in self.platform_of:
+            self.claimable.move(order_id, self.dispatch_rank(order_id))
+
+    def reposition(self, order_id: str) -> None:
+        if order_id in self.claimable:
+            self.resume(order_id)
+
+    def is_open(self, order_id: str) -> bool:
+        return order_id in self.platform_of
+
+    def has_claimed(self, engager_id: str, order_id: str) -> bool:
+        return order_id in self.claimed(engager_id)
+
+    def claim(self, engager_id: str, order_id: str) -> None:
+        self.claimed(engager_id).add(order_id)
+
+    def release(self, engager_id: str, order_id: str) -> None:
+        self.claimed(engager_id).discard(order_id)
+
+    def forget_engager(self, engager_id: str) -> None:
+        self.claims.pop(engager_id, None)
+
+    def available(self, engager_id: str, cursor=None, backwards: bool = False,
+                  size: int = TASKS_PAGE_SIZE) -> tuple:
+        """A cursor_page of claimable orders the engager hasn't claimed, best first."""
+        claimed = self.claimed(engager_id)
+        return cursor_page(self.claimable, cursor, backwards, size, keep=lambda order_id: order_id not in claimed)
+
+    def next_best(self, engager_id: str):
+        """The top-ranked order this engager can still claim, if any."""
+        page, _, _ = self.available(engager_id, size=1)
+        return page[0][1] if page else None
+
+task_index = TaskIndex()
+
+# Task leases
+# A claim reserves one unit (one follow, like or comment) of an order under a
+# time-limited lease: order['remaining'] counts the units nobody holds, and
+# users['task_leases'] persists the leases themselves. Claims run without an
+# await between the capacity check and the decrement, so two engagers can never
+# take the same unit. Expiries sit in a heap swept by a scheduler job, which
+# only ever touches leases that are actually due.
+TASK_METRICS = ('follows', 'likes', 'comments')
+TASK_LEASE_SECONDS = int(os.getenv("TASK_LEASE_SECONDS", 900))
+LEASE_SWEEP_INTERVAL = int(os.getenv("LEASE_SWEEP_INTERVAL", 30))
+
+def order_capacity(order: dict) -> dict:
+    """Units per metric still free to lease; orders from before leases start full."""
+    if 'remaining' not in order:
+        order['remaining'] = {m: max(order.get(m, 0), 0) for m in TASK_METRICS}
+    return order['remaining']
+
+def task_unit_id(order_id: str, metric: str, n: int) -> str:
+    # e.g. "<order_id>-f12": the 12th follow handed out on that order. Never stored on its own.
+    return f"{order_id}-{metric[0]}{n}"
+
+def has_capacity(order: dict) -> bool:
+    return any(n > 0 for n in order_capacity(order).values())
+
+def return_task_unit(order_id: str, metric: str) -> None:
+    order = users['active_orders'].get(order_id)
+    if order is not None:
+        order_capacity(order)[metric] += 1
+        task_index.resume(order_id)
+
+class LeaseBook:
+    def __init__(self):
+        self.heap = []  # (expires, lease_id)
+
+    def rebuild(self, state: dict) -> None:
+        self.heap = [(lease['expires'], lease_id) for lease_id, lease in state['task_leases'].items()]
+        heapq.heapify(self.heap)
+
+    def acquire(self, engager_id: str, order_id: str):
+        """Lease one unit of the order's most-needed metric; None when it's fully taken."""
+        order = users['active_orders'][order_id]
+        remaining = order_capacity(order)
+        metric = max(TASK_METRICS, key=lambda m: remaining[m])
+        if remaining[metric] <= 0:
+            task_index.pause(order_id)
+            return None
+        remaining[metric] -= 1
+        if has_capacity(order):
+            task_index.reposition(order_id)
+        else:
+            task_index.pause(order_id)
+        issued = order.setdefault('issued', {})
+        issued[metric] = issued.get(metric, 0) + 1
+        lease_id = uuid.uuid4().hex[:12]
+        lease = {
+            'order_id': order_id,
+            'metric': metric,
+            'unit': task_unit_id(order_id, metric, issued[metric]),
+            'engager_id': engager_id,
+            'expires': time.time() + TASK_LEASE_SECONDS,
+        }
+        users['task_leases'][lease_id] = lease
+        heapq.heappush(self.heap, (lease['expires'], lease_id))
+        return lease_id, lease
+
+    def settle(self, lease_id: str):
+        """End a lease whose unit was handed in; the unit stays reserved for review."""
+        return users['task_leases'].pop(lease_id, None)
+
+    def expire_due(self, now: float) -> list:
+        expired = []
+        while self.heap and self.heap[0][0] <= now:
+            _, lease_id = heapq.heappop(self.heap)
+            lease = users['task_leases'].pop(lease_id, None)
+            if lease is None:
+                continue  # settled before it ran out
+            return_task_unit(lease['order_id'], lease['metric'])
+            expired.append((lease_id, lease))
+        return expired
+
+lease_book = LeaseBook()
+
+async def expire_task_leases() -> None:
+    expired = lease_book.expire_due(time.time())
+    for lease_id, lease in expired:
+        engager_id, order_id = lease['engager_id'], lease['order_id']
+        engager = users['engagers'].get(engager_id)
+        if engager is None or engager.get('current_lease') != lease_id:
+            continue
+        engager['current_task'] = None
+        engager['current_lease'] = None
+        if order_id in engager.get('claims', []):
+            engager['claims'].remove(order_id)
+        task_index.release(engager_id, order_id)
+        enqueue_message(
+            chat_id=int(engager_id),
+            text=f"⌛ Your claim on task *{order_id}* timed out—it’s back in the pool. Grab another with /tasks!",
+            parse_mode='Markdown'
+        )
+    if expired:
+        logger.info(f"Expired {len(expired)} task leases")
+        await save_users()
+
+# Paystack
+# Every Paystack call goes through one long-lived aiohttp session, so TLS
+# connections to the API are pooled and kept alive between payments instead of
+# a fresh handshake per request. main() opens it and closes it on shutdown.
+# Read-only GETs retry timeouts, dropped connections and 5xx/429 answers with
+# backoff; POSTs never retry, as Paystack refuses a reference it has seen.
+PAYSTACK_TIMEOUT = float(os.getenv("PAYSTACK_TIMEOUT", 15))
+PAYSTACK_POOL_SIZE = int(os.getenv("PAYSTACK_POOL_SIZE", 20))
+PAYSTACK_KEEPALIVE = 60
+PAYSTACK_RETRIES = int(os.getenv("PAYSTACK_RETRIES", 2))
+PAYSTACK_RETRY_DELAY = 0.5  # seconds, doubled per retry
+
+class PaystackError(Exception):
+    """A Paystack call that failed, timed out or came back with status false."""
+
+    def __init__(self, message: str, http_status: int = None, payload: dict = None):
+        super().__init__(message)
+        self.http_status = http_status
+        self.payload = payload
+
+class PaystackClient:
+    def __init__(self, secret_key: str, base_url: str = PAYSTACK_BASE_URL,
+                 timeout: float = PAYSTACK_TIMEOUT, pool_size: int = PAYSTACK_POOL_SIZE):
+        self.secret_key = secret_key
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.session = None
+        self.stats = {'calls': 0, 'errors': 0, 'retries': 0}
+
+    async def start(self) -> None:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=PAYSTACK_KEEPALIVE, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Authorization": f"Bearer {self.secret_key}"},
+            )
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _request(self, method: str, path: str, timeout: float = None, **kwargs) -> dict:
+        """The decoded response body; raises PaystackError unless it says status true."""
+        attempts = 1 + (PAYSTACK_RETRIES if method == 'GET' else 0)
+        for attempt in range(attempts):
+            try:
+                return await self._request_once(method, path, timeout, **kwargs)
+            except PaystackError as e:
+                retryable = e.http_status is None or e.http_status >= 500 or e.http_status == 429
+                if not retryable or attempt + 1 >= attempts:
+                    raise
+                self.stats['retries'] += 1
+                logger.warning(f"{e}; retrying ({attempt + 1}/{PAYSTACK_RETRIES})")
+                await asyncio.sleep(PAYSTACK_RETRY_DELAY * 2 ** attempt)
+
+    async def _request_once(self, method: str, path: str, timeout: float = None, **kwargs) -> dict:
+        await self.start()
+        self.stats['calls'] += 1
+        if timeout is not None:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+        try:
+            async with self.session.request(method, f"{self.base_url}{path}", **kwargs) as resp:
+                body = await resp.json(content_type=None)
+                if resp.status != 200 or not isinstance(body, dict) or not body.get('status'):
+                    message = body.get('message') if isinstance(body, dict) else None
+                    raise PaystackError(f"{method} {path} failed: {resp.status} {message}", resp.status, body)
+                return body
+        except PaystackError:
+            self.stats['errors'] += 1
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self.stats['errors'] += 1
+            raise PaystackError(f"{method} {path} failed: {e!r}") from e
+
+    async def initialize_transaction(self, email: str, amount: int, reference: str,
+                                     callback_url: str = None, metadata: dict = None, timeout: float = None) -> dict:
+        """Start a transaction (amount in kobo); returns authorization_url, access_code and reference."""
+        payload = {"email": email, "amount": amount, "reference": reference}
+        if callback_url:
+            payload["callback_url"] = callback_url
+        if metadata:
+            payload["metadata"] = metadata
+        body = await self._request('POST', '/transaction/initialize', timeout=timeout, json=payload)
+        return body['data']
+
+    async def verify_transaction(self, reference: str, timeout: float = None) -> dict:
+        body = await self._request('GET', f'/transaction/verify/{reference}', timeout=timeout)
+        return body['data']
+
+    async def list_transactions(self, page: int = 1, per_page: int = 50, status: str = None,
+                                since: str = None, timeout: float = None) -> tuple:
+        """One page of transactions, newest first, as (transactions, meta)."""
+        params = {"page": page, "perPage": per_page}
+        if status:
+            params["status"] = status
+        if since:
+            params["from"] = since
+        body = await self._request('GET', '/transaction', timeout=timeout, params=params)
+        return body['data'], body.get('meta', {})
+
+    def metrics(self) -> dict:
+        return {**self.stats, 'open': self.session is not None and not self.session.closed}
+
+paystack = PaystackClient(PAYSTACK_SECRET_KEY)
+
+# Payment links
+# /pay hands back the link already issued for an order until it expires or the
+# price changes, so repeat taps cost no API call. A link issued after that gets
+# a fresh reference, "<order_id>.<n>", because Paystack refuses one it has seen.
+# Concurrent taps share a single in-flight initialize call.
+PAYMENT_LINK_TTL = int(os.getenv("PAYMENT_LINK_TTL", 24 * 3600))
+PAYMENT_CALLBACK_URL = "https://vibeliftbot.onrender.com/static/success.html"
+payment_link_requests = {}  # order_id -> in-flight issue_payment_link task
+
+def cached_payment_link(order: dict):
+    link = order.get('payment_link')
+    if link and link['amount'] == order['price'] * 100 and link['expires'] > time.time():
+        return link
+    return None
+
+def invalidate_payment_link(order: dict) -> None:
+    order.pop('payment_link', None)
+
+def order_id_for_reference(reference: str) -> str:
+    return reference.split('.', 1)[0]
+
+async def issue_payment_link(order_id: str, order: dict, email: str) -> dict:
+    attempts = order.get('payment_attempts', 0) + 1
+    order['payment_attempts'] = attempts
+    reference = order_id if attempts == 1 else f"{order_id}.{attempts}"
+    amount = order['price'] * 100  # Paystack uses kobo
+    transaction = await paystack.initialize_transaction(
+        email=email,
+        amount=amount,
+        reference=reference,
+        callback_url=PAYMENT_CALLBACK_URL,
+        metadata={"order_id": order_id},
+    )
+    # Re-read through the tracked collection: a background flush during the await
+    # may have drained this order's touch, and save_users() alone won't restore it.
+    order = users['pending_orders'].get(order_id, order)
+    order['payment_link'] = {
+        'url': transaction['authorization_url'],
+        'access_code': transaction.get('access_code'),
+        'reference': reference,
+        'amount': amount,
+        'expires': time.time() + PAYMENT_LINK_TTL,
+    }
+    await save_users()
+    return order['payment_link']
+
+async def payment_link(order_id: str, order: dict, email: str) -> dict:
+    link = cached_payment_link(order)
+    if link:
+        return link
+    pending = payment_link_requests.get(order_id)
+    if pending is None:
+        pending = asyncio.ensure_future(issue_payment_link(order_id, order, email))
+        payment_link_requests[order_id] = pending
+        pending.add_done_callback(lambda _: payment_link_requests.pop(order_id, None))
+    return await asyncio.shield(pending)
+
 # Core Commands
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_id = str(update.effective_user.id)
@@ -167,9 +1751,9 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         bonus_msg = ""
 
     keyboard = [
-        [InlineKeyboardButton("Join as Client", callback_data='client')],
-        [InlineKeyboardButton("Join as Engager", callback_data='engager')],
-        [InlineKeyboardButton("Help", callback_data='help')]
+        [InlineKeyboardButton("Join as Client", callback_data=cb('client'))],
+        [InlineKeyboardButton("Join as Engager", callback_data=cb('engager'))],
+        [InlineKeyboardButton("Help", callback_data=cb('help'))]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
     message_text = (
@@ -243,10 +1827,10 @@ async def client(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
                 "Check /status for the latest or start a new one below!"
             )
             keyboard = [
-                [InlineKeyboardButton("Instagram", callback_data="platform_instagram")],
-                [InlineKeyboardButton("Facebook", callback_data="platform_facebook")],
-                [InlineKeyboardButton("TikTok", callback_data="platform_tiktok")],
-                [InlineKeyboardButton("Twitter", callback_data="platform_twitter")]
+                [InlineKeyboardButton("Instagram", callback_data=cb('pf', 'instagram'))],
+                [InlineKeyboardButton("Facebook", callback_data=cb('pf', 'facebook'))],
+                [InlineKeyboardButton("TikTok", callback_data=cb('pf', 'tiktok'))],
+                [InlineKeyboardButton("Twitter", callback_data=cb('pf', 'twitter'))]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             if update.callback_query:
@@ -266,10 +1850,10 @@ async def client(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     users['clients'][user_id] = {'step': 'select_platform'}
     await save_users()
     keyboard = [
-        [InlineKeyboardButton("Instagram", callback_data="platform_instagram")],
-        [InlineKeyboardButton("Facebook", callback_data="platform_facebook")],
-        [InlineKeyboardButton("TikTok", callback_data="platform_tiktok")],
-        [InlineKeyboardButton("Twitter", callback_data="platform_twitter")]
+        [InlineKeyboardButton("Instagram", callback_data=cb('pf', 'instagram'))],
+        [InlineKeyboardButton("Facebook", callback_data=cb('pf', 'facebook'))],
+        [InlineKeyboardButton("TikTok", callback_data=cb('pf', 'tiktok'))],
+        [InlineKeyboardButton("Twitter", callback_data=cb('pf', 'twitter'))]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
     message_text = "Which platform are we juicing up today? 🎯"
@@ -304,6 +1888,7 @@ async def engager(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         else:
             message_text = "Welcome to the engager squad! 💼 Ready to earn some ₦? Hit /tasks to get started!"
         users['engagers'][user_id] = {'xp': 0, 'balance': 0, 'task_count': 0}
+        leaderboard_index.update(user_id, 0)
         await save_users()
     if update.callback_query:
         query = update.callback_query
@@ -326,8 +1911,8 @@ async def engager(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if referral_bonus:
         users['engagers'][user_id]['signup_bonus'] += 300
     keyboard = [
-        [InlineKeyboardButton("See Tasks", callback_data='tasks')],
-        [InlineKeyboardButton("Check Balance", callback_data='balance')]
+        [InlineKeyboardButton("See Tasks", callback_data=cb('tasks'))],
+        [InlineKeyboardButton("Check Balance", callback_data=cb('balance'))]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
     message_text = (
@@ -356,10 +1941,10 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             await update.message.reply_text(reply)
         return
     keyboard = [
-        [InlineKeyboardButton("How to Order", callback_data='help_order')],
-        [InlineKeyboardButton("How to Earn", callback_data='help_earn')],
-        [InlineKeyboardButton("Check Status", callback_data='help_status')],
-        [InlineKeyboardButton("Support", callback_data='help_support')]
+        [InlineKeyboardButton("How to Order", callback_data=cb('hp', 'order'))],
+        [InlineKeyboardButton("How to Earn", callback_data=cb('hp', 'earn'))],
+        [InlineKeyboardButton("Check Status", callback_data=cb('hp', 'status'))],
+        [InlineKeyboardButton("Support", callback_data=cb('hp', 'support'))]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
     message_text = (
@@ -376,30 +1961,22 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 async def pay(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_id = str(update.effective_user.id)
     logger.info(f"Received /pay command from user {user_id}")
+    if not check_rate_limit(user_id, action='pay'):
+        await update.message.reply_text(random.choice(witty_rate_limit))
+        return
     if user_id not in users['clients'] or users['clients'][user_id]['step'] != 'awaiting_payment':
         await update.message.reply_text("No order to pay for yet, fam! 🌟 Start with /client!")
         return
     client_data = users['clients'][user_id]
     order_id = client_data['order_id']
     order = users['pending_orders'][order_id]
-    amount = order['price'] * 100  # Paystack uses kobo
-    payment_data = {
-        "amount": amount,
-        "email": f"{user_id}@vibeliftbot.com",
-        "reference": order_id,
-        "callback_url": f"https://vibeliftbot.onrender.com/static/success.html",
-        "metadata": {"order_id": order_id}
-    }
-    url = "https://api.paystack.co/transaction/initialize"
-    headers = {"Authorization": f"Bearer {PAYSTACK_SECRET_KEY}", "Content-Type": "application/json"}
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers=headers, json=payment_data) as resp:
-            response_data = await resp.json()
-            if resp.status != 200 or not response_data.get("data"):
-                logger.error(f"Paystack API error: {response_data}")
-                await update.message.reply_text("Payment’s tripping! 😵 Try again or hit up support!")
-                return
-    auth_url = response_data["data"]["authorization_url"]
+    try:
+        link = await payment_link(order_id, order, f"{user_id}@vibeliftbot.com")
+    except PaystackError as e:
+        logger.error(f"Paystack API error: {e} {e.payload}")
+        await update.message.reply_text("Payment’s tripping! 😵 Try again or hit up support!")
+        return
+    auth_url = link['url']
     await update.message.reply_text(
         f"Time to make it rain! 💸\n"
         f"Order *{order_id}*: ₦{order['price']}\n"
@@ -409,66 +1986,188 @@ async def pay(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     )
     # Part 2: Button Handlers for vibelift_bot.py
 
+# Callback data
+# Buttons carry "route:arg:arg". Telegram caps callback_data at 64 bytes, so any
+# argument longer than CALLBACK_TOKEN_MIN_LENGTH (order and completion UUIDs,
+# mostly) travels as a short "~token" that users['callback_tokens'] maps back to
+# the full id for CALLBACK_TOKEN_TTL. An id keeps one live token, so redrawn
+# menus reuse it; expiries sit in a heap swept by a scheduler job. Cursor
+# positions (ints and int tuples) always go inline: they change on every page, so
+# tokenizing them would write a fresh token per render.
+CALLBACK_DATA_LIMIT = 64
+CALLBACK_TOKEN_MIN_LENGTH = 16
+CALLBACK_TOKEN_TTL = int(os.getenv("CALLBACK_TOKEN_TTL", 7 * 24 * 3600))
+CALLBACK_TOKEN_SWEEP_INTERVAL = int(os.getenv("CALLBACK_TOKEN_SWEEP_INTERVAL", 3600))
+
+class CallbackTokens:
+    def __init__(self):
+        self.entries = {}  # token -> (value, expires); mirrors users['callback_tokens'] for lookups
+        self.by_value = {}  # value -> token
+        self.heap = []  # (expires, token)
+
+    def rebuild(self, state: dict) -> None:
+        self.entries = {token: (entry['v'], entry['exp']) for token, entry in state['callback_tokens'].items()}
+        self.by_value = {value: token for token, (value, _) in self.entries.items()}
+        self.heap = [(expires, token) for token, (_, expires) in self.entries.items()]
+        heapq.heapify(self.heap)
+
+    def issue(self, value: str) -> str:
+        """The token for value, extended once it is past half its life."""
+        global users_dirty
+        now = time.time()
+        token = self.by_value.get(value)
+        if token is not None and self.entries[token][1] - now > CALLBACK_TOKEN_TTL / 2:
+            return token
+        if token is None:
+            token = f"~{uuid.uuid4().hex[:8]}"
+            while token in self.entries:
+                token = f"~{uuid.uuid4().hex[:8]}"
+            self.by_value[value] = token
+        expires = now + CALLBACK_TOKEN_TTL
+        self.entries[token] = (value, expires)
+        users['callback_tokens'][token] = {'v': value, 'exp': expires}
+        heapq.heappush(self.heap, (expires, token))
+        users_dirty = True  # picked up by the next background flush
+        return token
+
+    def resolve(self, token: str):
+        entry = self.entries.get(token)
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry[0]
+
+    def evict_due(self, now: float) -> int:
+        evicted = 0
+        while self.heap and self.heap[0][0] <= now:
+            _, token = heapq.heappop(self.heap)
+            entry = self.entries.get(token)
+            if entry is None or entry[1] > now:
+                continue  # extended since this expiry was queued
+            del self.entries[token]
+            self.by_value.pop(entry[0], None)
+            users['callback_tokens'].pop(token, None)
+            evicted += 1
+        return evicted
+
+callback_tokens = CallbackTokens()
+
+async def evict_callback_tokens() -> None:
+    evicted = callback_tokens.evict_due(time.time())
+    if evicted:
+        logger.info(f"Evicted {evicted} expired callback tokens")
+        await save_users()
+
+def cb(route: str, *args) -> str:
+    """Callback data for a button: cb('ao', order_id) -> 'ao:~1f2e3d4c'."""
+    parts = [route]
+    for arg in args:
+        if isinstance(arg, (int, tuple)):
+            parts.append(encode_cursor(arg))
+            continue
+        arg = str(arg)
+        parts.append(callback_tokens.issue(arg) if len(arg) > CALLBACK_TOKEN_MIN_LENGTH else arg)
+    data = ':'.join(parts)
+    if len(data.encode()) > CALLBACK_DATA_LIMIT:
+        logger.warning(f"Callback data over {CALLBACK_DATA_LIMIT} bytes: {data}")
+    return data
+
+# Buttons already sitting in chats from before routes: legacy prefix -> route.
+# Overlapping prefixes go longest first; the rest of the data splits on '_'.
+LEGACY_CALLBACK_PREFIXES = (
+    ('platform_', 'pf'), ('help_', 'hp'), ('cancel_order_', 'co'), ('cancel_', 'cx'),
+    ('task_claim_', 'tc'), ('pagep_', 'pb'), ('page_', 'pg'), ('bulk_', 'bk'), ('sel_', 'sl'),
+    ('admin_approve_order_', 'ao'), ('admin_reject_order_', 'ro'), ('admin_generate_tasks_', 'gt'),
+    ('admin_approve_task_', 'at'), ('admin_reject_task_', 'rt'),
+    ('approve_payout_', 'ap'), ('reject_payout_', 'rp'), ('priority_', 'pr'),
+)
+LEGACY_CALLBACKS = {
+    'task_next': ('tn', []), 'admin_dashboard': ('ad', []), 'admin_generate_code': ('gc', []),
+    'admin_approve_order': ('pk', ['ao']), 'admin_reject_order': ('pk', ['ro']),
+    'admin_approve_task': ('pk', ['at']), 'admin_reject_task': ('pk', ['rt']),
+    'admin_approve_payout': ('pk', ['ap']), 'admin_reject_payout': ('pk', ['rp']),
+    'admin_set_priority': ('pk', ['pr']), 'admin_cancel_order': ('pk', ['co']),
+}
+
+def parse_callback(data: str):
+    """(route, args) for callback data, or None if nothing routes it.
+
+    A token that has expired comes back as None in args.
+    """
+    route, _, rest = data.partition(':')
+    if route in CALLBACK_ROUTES:
+        args = rest.split(':') if rest else []
+        return route, [callback_tokens.resolve(arg) if arg.startswith('~') else arg for arg in args]
+    if data in LEGACY_CALLBACKS:
+        route, args = LEGACY_CALLBACKS[data]
+        return route, list(args)
+    for prefix, route in LEGACY_CALLBACK_PREFIXES:
+        if data.startswith(prefix):
+            return route, data[len(prefix):].split('_')
+    return None
+
 async def button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
     await query.answer()
     user_id = str(query.from_user.id)
     data = query.data
     logger.info(f"Button clicked by user {user_id}: {data}")
+    parsed = parse_callback(data)
+    if parsed is None:
+        logger.warning(f"Unroutable button {data} from user {user_id}")
+        return
+    route, args = parsed
+    handler, admin_only = CALLBACK_ROUTES[route]
+    if admin_only and user_id not in ADMINS:
+        await query.message.edit_text("Admin zone, fam! 🛡️ No entry unless you’re the boss!")
+        return
+    if None in args:
+        await query.message.edit_text("That button’s gone stale! 🕰️ Pull up a fresh menu and try again!")
+        return
     try:
-        if data == 'client':
-            await client(update, context)
-        elif data == 'engager':
-            await engager(update, context)
-        elif data == 'help':
-            await help_command(update, context)
-        elif data == 'tasks':
-            await tasks(update, context)
-        elif data == 'balance':
-            await balance(update, context)
-        elif data == 'withdraw':
-            await withdraw(update, context)
-        elif data.startswith('platform_'):
-            platform = data.split('_')[1]
-            if platform not in package_limits['bundle']:
-                await query.message.edit_text("Oops, that platform’s not on the menu! Try /client again! 😅", parse_mode='Markdown')
-                return
-            users['clients'][user_id] = {'step': 'awaiting_order', 'platform': platform}
-            await save_users()
-            bundles = "\n".join(
-                f"- *{k.capitalize()}*: {v['follows']} follows, {v['likes']} likes, {v['comments']} comments (₦{v['price']})"
-                for k, v in package_limits['bundle'][platform].items()
-            )
-            await query.message.edit_text(
-                f"Locked in *{platform.capitalize()}*! 🚀\n"
-                "[*Order* ➡️ Payment ➡️ Approval ➡️ Active]\n"
-                f"Pick your vibe:\n{bundles}\n"
-                "*How to order:*\n"
-                "1. *Handle + Bundle* ➡️ `@myhandle starter`\n"
-                "2. *URL + Bundle* ➡️ `https://instagram.com/username pro`\n"
-                "3. *Package + Pic* ➡️ `package starter` + 📸\n"
-                "4. *Custom + Pic* ➡️ `username, 20 follows, 30 likes, 20 comments` + 📸\n"
-                "Custom limits: 10-500. Pics optional for 1 & 2.",
-                parse_mode='Markdown'
-            )
-        elif data.startswith('task_'):
-            await handle_task_button(query, int(user_id), user_id, data)
-        elif data.startswith('help_'):
-            await handle_help_button(query, data)
-        elif data.startswith('cancel_'):
-            await handle_cancel_button(query, user_id, data)
-        elif data.startswith('admin_') or data.startswith('approve_payout_') or data.startswith('reject_payout_') or data.startswith('priority_') or data.startswith('cancel_order_'):
-            await handle_admin_button(query, int(user_id), user_id, data)
+        await handler(update, context, user_id, *args)
     except Exception as e:
         logger.error(f"Error handling button {data} for user {user_id}: {e}", exc_info=True)
         try:
-            await query.message.edit_text("Oops, something broke! Try again or hit /help! 😅", parse_mode='Markdown')
+            if admin_only:
+                await query.message.edit_text(f"Button’s acting up, fam! 😵 Error: {str(e)}—tell the tech crew!", parse_mode='Markdown')
+            else:
+                await query.message.edit_text("Oops, something broke! Try again or hit /help! 😅", parse_mode='Markdown')
         except Exception as e2:  # Properly nested under a new try block
             logger.warning(f"Failed to send error message to {user_id}: {e2}")
 
-async def handle_help_button(query: CallbackQuery, data: str) -> None:
-    action = data.split('_')[1]
-    if action == 'order':
+def command_route(command):
+    """Route a no-argument button straight to the command handler of the same name."""
+    async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str) -> None:
+        await command(update, context)
+    return handler
+
+async def choose_platform(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str, platform: str) -> None:
+    query = update.callback_query
+    if platform not in package_limits['bundle']:
+        await query.message.edit_text("Oops, that platform’s not on the menu! Try /client again! 😅", parse_mode='Markdown')
+        return
+    users['clients'][user_id] = {'step': 'awaiting_order', 'platform': platform}
+    await save_users()
+    bundles = "\n".join(
+        f"- *{k.capitalize()}*: {v['follows']} follows, {v['likes']} likes, {v['comments']} comments (₦{v['price']})"
+        for k, v in package_limits['bundle'][platform].items()
+    )
+    await query.message.edit_text(
+        f"Locked in *{platform.capitalize()}*! 🚀\n"
+        "[*Order* ➡️ Payment ➡️ Approval ➡️ Active]\n"
+        f"Pick your vibe:\n{bundles}\n"
+        "*How to order:*\n"
+        "1. *Handle + Bundle* ➡️ `@myhandle starter`\n"
+        "2. *URL + Bundle* ➡️ `https://instagram.com/username pro`\n"
+        "3. *Package + Pic* ➡️ `package starter` + 📸\n"
+        "4. *Custom + Pic* ➡️ `username, 20 follows, 30 likes, 20 comments` + 📸\n"
+        "Custom limits: 10-500. Pics optional for 1 & 2.",
+        parse_mode='Markdown'
+    )
+
+async def handle_help_button(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str, topic: str) -> None:
+    query = update.callback_query
+    if topic == 'order':
         await query.message.edit_text(
             "🌟 *How to Order Like a Pro* 🌟\n"
             "1. Hit /client and pick a platform 🎯\n"
@@ -477,7 +2176,7 @@ async def handle_help_button(query: CallbackQuery, data: str) -> None:
             "4. Wait for admin magic—track it with /status! ✨",
             parse_mode='Markdown'
         )
-    elif action == 'earn':
+    elif topic == 'earn':
         await query.message.edit_text(
             "💼 *How to Stack Cash* 💼\n"
             "1. Join with /engager 🏆\n"
@@ -487,29 +2186,30 @@ async def handle_help_button(query: CallbackQuery, data: str) -> None:
             "5. Cash out with /withdraw at ₦1000! 💸",
             parse_mode='Markdown'
         )
-    elif action == 'status':
+    elif topic == 'status':
         await query.message.edit_text(
             "🔍 *Check Your Vibe* 🔍\n"
             "Just type /status to see where your order’s at! 🚀\n"
             "From payment to active—it’s all there!",
             parse_mode='Markdown'
         )
-    elif action == 'support':
+    elif topic == 'support':
         await query.message.edit_text(
             "🆘 *Need a Hero?* 🆘\n"
             "Drop a line to [Your Support Link] and we’ll swoop in! 😎",
             parse_mode='Markdown'
         )
 
-async def handle_cancel_button(query: CallbackQuery, user_id: str, data: str) -> None:
-    action = data.split('_')[1]
-    if action == 'yes':
+async def handle_cancel_button(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str, answer: str) -> None:
+    query = update.callback_query
+    if answer == 'yes':
         if user_id in users['clients']:
             client_data = users['clients'][user_id]
             if client_data['step'] in ['awaiting_payment', 'awaiting_approval']:
                 order_id = client_data.get('order_id')
                 if order_id and order_id in users['pending_orders']:
                     del users['pending_orders'][order_id]
+                    picker_lists['pending_orders'].discard(order_id)
                 del users['clients'][user_id]
                 await save_users()
                 await query.message.edit_text("Order wiped out! 🚫 Start fresh with /client!")
@@ -517,367 +2217,568 @@ async def handle_cancel_button(query: CallbackQuery, user_id: str, data: str) ->
                 await query.message.edit_text("Nothing to ditch here! 😏 Kick off with /client!")
         elif user_id in users['engagers']:
             del users['engagers'][user_id]
+            task_index.forget_engager(user_id)
+            payout_queue.remove(user_id)
+            leaderboard_index.remove(user_id)
             await save_users()
             await query.message.edit_text("You’re out of the engager club! 🎬 Rejoin with /engager!")
         else:
             await query.message.edit_text("Nothing to cancel, fam! 🌟 Pick a role with /start!")
-    elif action == 'no':
+    elif answer == 'no':
         await query.message.edit_text("Phew, crisis averted! 😅 Back to business—try /client or /engager!")
 
-async def handle_task_button(query: CallbackQuery, user_id: int, user_id_str: str, data: str) -> None:
-    action = data.split('_')[1]
-    task_id = data.split('_')[-1]
-    if action == 'claim':
-        if task_id not in users['active_orders']:
-            await query.message.edit_text("Task’s gone poof! 🚫 Check /tasks for fresh ones!")
-            return
-        if task_id in users['engagers'][user_id_str].get('claims', []):
-            await query.message.edit_text("You’ve already nabbed this one, sneaky! 😏")
-            return
+async def claim_next_task(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str) -> None:
+    task_id = task_index.next_best(user_id)
+    if task_id is None:
+        await update.callback_query.message.edit_text("No tasks up for grabs right now! ⏰ Check back soon!")
+        return
+    await claim_task(update, context, user_id, task_id)
+
+async def claim_task(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str, task_id: str) -> None:
+    query = update.callback_query
+    if not task_index.is_open(task_id):
+        await query.message.edit_text("Task’s gone poof! 🚫 Check /tasks for fresh ones!")
+        return
+    if task_index.has_claimed(user_id, task_id):
+        await query.message.edit_text("You’ve already nabbed this one, sneaky! 😏")
+        return
+    engager = users['engagers'][user_id]
+    if engager.get('current_lease') in users['task_leases']:
+        await query.message.edit_text(
+            f"Finish task *{engager['current_task']}* first—one at a time, hustler! 📸",
+            parse_mode='Markdown'
+        )
+        return
+    leased = lease_book.acquire(user_id, task_id)
+    if leased is None:
+        await query.message.edit_text("Every slot on that task’s taken! 🏃 Check /tasks for fresh ones!")
+        return
+    lease_id, lease = leased
+    order = users['active_orders'][task_id]
+    platform = order['platform']
+    engager.setdefault('claims', []).append(task_id)
+    task_index.claim(user_id, task_id)
+    engager['current_task'] = task_id
+    engager['current_lease'] = lease_id
+    await save_users()
+    task_message = (
+        f"Task *{task_id}* claimed! 🚀\n"
+        f"Platform: {platform.capitalize()}\n"
+        f"Handle/URL: {order['handle_or_url']}\n"
+        f"Do: 1 {lease['metric'][:-1]}\n"
+        f"You’ve got {TASK_LEASE_SECONDS // 60} minutes—send a screenshot of your work, no text needed! 📸"
+    )
+    await query.message.edit_text(task_message, parse_mode='Markdown')
+
+# Review transitions
+# Each apply_* helper makes one review decision on the in-memory state without
+# awaiting and reports what happened, or None when the item was already handled.
+# Single-item buttons and bulk actions share them; the caller persists once and
+# sends notifications through the outbox afterwards.
+TASK_REWARD = 20
+TASK_XP = 10
+
+def apply_task_approval(completion_id: str):
+    completion = users['pending_task_completions'].pop(completion_id, None)
+    if completion is None:
+        return None
+    picker_lists['completions'].discard(completion_id)
+    engager_id = completion['engager_id']
+    task_id = completion['task_id']
+    engager = users['engagers'][engager_id]
+    engager['earnings'] = engager.get('earnings', 0) + TASK_REWARD
+    payout_queue.adjust(engager_id, TASK_REWARD)
+    engager['xp'] = engager.get('xp', 0) + TASK_XP
+    leaderboard_index.update(engager_id, engager['xp'])
+    outcome = {'engager_id': engager_id, 'task_id': task_id, 'completed_order': None}
+    metric = completion.get('metric')  # claims from before leases carry no unit
+    if metric and task_id in users['active_orders']:
         order = users['active_orders'][task_id]
-        platform = order['platform']
-        users['engagers'][user_id_str]['claims'].append(task_id)
-        users['engagers'][user_id_str]['current_task'] = task_id
-        await save_users()
-        task_message = (
-            f"Task *{task_id}* claimed! 🚀\n"
-            f"Platform: {platform.capitalize()}\n"
-            f"Handle/URL: {order['handle_or_url']}\n"
-            f"Do: {order['follows']} follows, {order['likes']} likes, {order['comments']} comments\n"
-            "Send a screenshot of your work (e.g., comment)—no text needed! 📸"
+        order[metric] -= 1
+        if all(order.get(m, 0) <= 0 for m in TASK_METRICS):
+            users['active_orders'].pop(task_id)
+            task_index.close_order(task_id)
+            outcome['completed_order'] = (task_id, order['client_id'])
+    return outcome
+
+def apply_task_rejection(completion_id: str):
+    completion = users['pending_task_completions'].pop(completion_id, None)
+    if completion is None:
+        return None
+    picker_lists['completions'].discard(completion_id)
+    engager_id = completion['engager_id']
+    task_id = completion['task_id']
+    engager = users['engagers'].get(engager_id)
+    if engager and task_id in engager.get('claims', []):
+        engager['claims'].remove(task_id)
+    task_index.release(engager_id, task_id)
+    if 'metric' in completion:
+        return_task_unit(task_id, completion['metric'])
+    return {'engager_id': engager_id, 'task_id': task_id}
+
+def apply_payout_approval(user_id: str):
+    """Zero the engager's balance and return the amount paid, or None if nothing was waiting."""
+    user_data = users['engagers'].get(user_id)
+    if not user_data or not user_data.get('awaiting_payout'):
+        return None
+    amount = user_data.get('earnings', 0) + user_data.get('signup_bonus', 0)
+    user_data['earnings'] = 0
+    user_data['signup_bonus'] = 0
+    user_data['awaiting_payout'] = False
+    payout_queue.remove(user_id)
+    return amount
+
+def apply_payout_rejection(user_id: str) -> bool:
+    user_data = users['engagers'].get(user_id)
+    if not user_data or not user_data.get('awaiting_payout'):
+        return False
+    user_data['awaiting_payout'] = False
+    payout_queue.remove(user_id)
+    return True
+
+def notify_completed_order(outcome: dict) -> None:
+    if outcome['completed_order']:
+        order_id, client_id = outcome['completed_order']
+        enqueue_message(
+            chat_id=int(client_id),
+            text=f"🎉 Your order *{order_id}* is fully vibed out—donezo!",
+            parse_mode='Markdown'
         )
-        await query.message.edit_text(task_message, parse_mode='Markdown')
 
-async def handle_admin_button(query: CallbackQuery, user_id: int, user_id_str: str, data: str) -> None:
-    if user_id_str not in ADMINS:
-        await query.message.edit_text("Admin zone, fam! 🛡️ No entry unless you’re the boss!")
-        return
-    
-    logger.info(f"Admin action triggered: {data}")
-    try:
-        # Split action correctly based on full prefix
-        if data.startswith('admin_'):
-            action = data.split('_', 2)[1]  # e.g., 'approve', 'reject'
-            target_id = data.split('_', 3)[-1] if len(data.split('_')) > 3 else None
-        else:
-            action = data.split('_', 1)[0]  # For non-admin_ prefixes like 'approve_payout'
-            target_id = data.split('_', 2)[-1] if len(data.split('_')) > 2 else None
+# Bulk review
+# "Next N", "all from engager X" and hand-picked selections go through
+# run_bulk_review(): every decision is applied in one pass, persisted with a
+# single durable flush, and each engager gets one combined DM.
+# Callbacks: bk:<t|p>:<a|r>:next:<n>, bk:t:<a|r>:eng:<engager>,
+# bk:<t|p>:<a|r>:sel, bk:<t|p>:pick (open selection) and
+# sl:<t|p>:<position>:<page start> (toggle one item).
+BULK_SIZES = (10, 50)
+review_selections = {}  # admin id -> {'t': set of completion ids, 'p': set of engager ids}
 
-        # Handle initial admin commands from /admin
-        if action == 'approve' and target_id == 'order':
-            if not users.get('pending_orders'):
-                await query.message.edit_text("No orders in the queue, chief! ✅ All quiet!")
-            else:
-                keyboard = [
-                    [InlineKeyboardButton(f"Order {order_id}", callback_data=f'admin_approve_order_{order_id}')]
-                    for order_id in users['pending_orders'].keys()
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.message.edit_text("Pick an order to green-light! 🚀", reply_markup=reply_markup)
-        elif action == 'reject' and target_id == 'order':
-            if not users.get('pending_orders'):
-                await query.message.edit_text("Nada to nix here! ✅ Queue’s empty!")
-            else:
-                keyboard = [
-                    [InlineKeyboardButton(f"Order {order_id}", callback_data=f'admin_reject_order_{order_id}')]
-                    for order_id in users['pending_orders'].keys()
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.message.edit_text("Which order’s getting the boot? 🚫", reply_markup=reply_markup)
-        elif action == 'approve' and target_id == 'task':
-            if not users.get('pending_task_completions'):
-                await query.message.edit_text("No tasks waiting, boss! ✅ All done!")
-            else:
-                keyboard = [
-                    [InlineKeyboardButton(f"Task {completion_id}", callback_data=f'admin_approve_task_{completion_id}')]
-                    for completion_id in users['pending_task_completions'].keys()
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.message.edit_text("Which task gets the thumbs-up? 👍", reply_markup=reply_markup)
-        elif action == 'reject' and target_id == 'task':
-            if not users.get('pending_task_completions'):
-                await query.message.edit_text("No tasks to toss! ✅ All clear!")
-            else:
-                keyboard = [
-                    [InlineKeyboardButton(f"Task {completion_id}", callback_data=f'admin_reject_task_{completion_id}')]
-                    for completion_id in users['pending_task_completions'].keys()
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.message.edit_text("Which task’s outta here? 🚫", reply_markup=reply_markup)
-        elif action == 'approve' and target_id == 'payout':
-            pending_payouts = {k: v for k, v in users['engagers'].items() if v.get('awaiting_payout')}
-            if not pending_payouts:
-                await query.message.edit_text("No payouts to bless! ✅ Cash flow’s chill!")
-            else:
-                keyboard = [
-                    [InlineKeyboardButton(f"User {uid}: ₦{v['earnings'] + v['signup_bonus']}", callback_data=f'approve_payout_{uid}')]
-                    for uid, v in pending_payouts.items()
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.message.edit_text("Who’s getting paid today? 💸", reply_markup=reply_markup)
-        elif action == 'reject' and target_id == 'payout':
-            pending_payouts = {k: v for k, v in users['engagers'].items() if v.get('awaiting_payout')}
-            if not pending_payouts:
-                await query.message.edit_text("No payouts to deny! ✅ All good!")
-            else:
-                keyboard = [
-                    [InlineKeyboardButton(f"User {uid}: ₦{v['earnings'] + v['signup_bonus']}", callback_data=f'reject_payout_{uid}')]
-                    for uid, v in pending_payouts.items()
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.message.edit_text("Who’s payout’s getting the axe? 🚫", reply_markup=reply_markup)
-        elif action == 'set' and target_id == 'priority':
-            if not users.get('active_orders'):
-                await query.message.edit_text("No orders to juice up! ✅ All quiet!")
-            else:
-                keyboard = [
-                    [InlineKeyboardButton(f"Order {order_id}", callback_data=f'priority_{order_id}')]
-                    for order_id in users['active_orders'].keys()
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.message.edit_text("Which order’s jumping the line? ⏫", reply_markup=reply_markup)
-        elif action == 'cancel' and target_id == 'order':
-            if not users.get('active_orders'):
-                await query.message.edit_text("No orders to zap! ✅ All chill!")
+def bulk_list_name(kind: str) -> str:
+    return 'completions' if kind == 't' else 'payouts'
+
+async def run_bulk_review(kind: str, approve: bool, item_ids: list) -> str:
+    per_engager = {}  # engager -> [items, naira]
+    completed_orders = []
+    skipped = failed = 0
+    for item_id in item_ids:
+        # One bad record must not strand the items already applied: they still get flushed and notified.
+        try:
+            if kind == 't':
+                outcome = apply_task_approval(item_id) if approve else apply_task_rejection(item_id)
             else:
-                keyboard = [
-                    [InlineKeyboardButton(f"Order {order_id}", callback_data=f'cancel_order_{order_id}')]
-                    for order_id in users['active_orders'].keys()
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.message.edit_text("Which order’s biting the dust? 🚫", reply_markup=reply_markup)
-        elif action == 'generate' and target_id == 'code':
-            code = generate_admin_code()
-            users['pending_admin_actions'][code] = {'type': 'admin_code', 'used': False}
-            await save_users()
-            await query.message.edit_text(
-                f"🎟️ Fresh admin code: *{code}*\n"
-                "Perfect for bonuses or VIP tricks—use it wisely!",
-                parse_mode='Markdown'
-            )
-            await update_admin_dashboard(query)
-
-        # Handle specific actions
-        elif data.startswith('admin_approve_order_'):
-            order_id = data.replace('admin_approve_order_', '')
-            if order_id in users['pending_orders']:
-                order = users['pending_orders'].pop(order_id)
-                client_id = order['client_id']
-                users['active_orders'][order_id] = order
-                if str(client_id) in users['clients']:
-                    users['clients'][str(client_id)]['step'] = 'active'  # Changed to 'active' for clarity
-                await save_users()
-                await query.message.edit_text(
-                    f"Order *{order_id}* is live—boom! 💥\n"
-                    "Next: Generate tasks for engagers!",
-                    parse_mode='Markdown',
-                    reply_markup=InlineKeyboardMarkup([
-                        [InlineKeyboardButton("Generate Tasks 📋", callback_data=f'admin_generate_tasks_{order_id}')],
-                        [InlineKeyboardButton("Back to Dashboard", callback_data='admin_dashboard')]
-                    ])
-                )
-                await application.bot.send_message(
-                    chat_id=int(client_id),
-                    text=f"🎉 Your order *{order_id}* is approved and rolling! 🚀 Check /status!",
-                    parse_mode='Markdown'
-                )
-            elif order_id in users['active_orders']:
-                await query.message.edit_text(f"Order *{order_id}* already vibin’—no double dip! ✅", parse_mode='Markdown')
-        elif data.startswith('admin_reject_order_'):
-            order_id = data.replace('admin_reject_order_', '')
-            if order_id in users['pending_orders']:
-                order = users['pending_orders'].pop(order_id)
-                client_id = order['client_id']
-                if str(client_id) in users['clients']:
-                    del users['clients'][str(client_id)]
-                await save_users()
-                await query.message.edit_text(f"Order *{order_id}* axed! 🚫 Tough call, boss!", parse_mode='Markdown')
-                await application.bot.send_message(
-                    chat_id=int(client_id),
-                    text=f"😕 Your order *{order_id}* got the boot—hit up support or retry with /client!",
-                    parse_mode='Markdown'
-                )
-                await update_admin_dashboard(query)
-        elif data.startswith('admin_generate_tasks_'):
-            order_id = data.replace('admin_generate_tasks_', '')
-            if order_id in users['active_orders']:
-                order = users['active_orders'][order_id]
-                # Simple task generation logic (expand as needed)
-                tasks = []
-                for metric, count in [('follows', order['follows']), ('likes', order['likes']), ('comments', order['comments'])]:
-                    for _ in range(count):
-                        task_id = str(uuid.uuid4())
-                        users['tasks'][task_id] = {
-                            'order_id': order_id,
-                            'type': metric[:-1],  # 'follow', 'like', 'comment'
-                            'handle_or_url': order['handle_or_url'],
-                            'status': 'pending'
-                        }
-                        tasks.append(task_id)
-                await save_users()
-                await query.message.edit_text(
-                    f"Tasks for order *{order_id}* generated—{len(tasks)} vibes ready! 📋\n"
-                    "Engagers can grab ‘em with /tasks!",
-                    parse_mode='Markdown',
-                    reply_markup=InlineKeyboardMarkup([
-                        [InlineKeyboardButton("Back to Dashboard", callback_data='admin_dashboard')]
-                    ])
-                )
-        elif data.startswith('admin_approve_task_'):
-            completion_id = data.replace('admin_approve_task_', '')
-            if completion_id in users['pending_task_completions']:
-                completion = users['pending_task_completions'].pop(completion_id)
-                engager_id = completion['engager_id']
-                task_id = completion['task_id']
-                earnings = 20
-                users['engagers'][engager_id]['earnings'] = users['engagers'][engager_id].get('earnings', 0) + earnings
-                users['engagers'][engager_id]['xp'] = users['engagers'][engager_id].get('xp', 0) + 10
-                if task_id in users['tasks']:
-                    task = users['tasks'].pop(task_id)
-                    order_id = task['order_id']
-                    if order_id in users['active_orders']:
-                        order = users['active_orders'][order_id]
-                        metric = task['type'] + 's'  # e.g., 'follows'
-                        order[metric] -= 1
-                        if all(order.get(m, 0) <= 0 for m in ['follows', 'likes', 'comments']):
-                            client_id = order['client_id']
-                            users['active_orders'].pop(order_id)
-                            await application.bot.send_message(
-                                chat_id=int(client_id),
-                                text=f"🎉 Your order *{order_id}* is fully vibed out—donezo!",
-                                parse_mode='Markdown'
-                            )
-                await save_users()
-                await query.message.edit_text(f"Task *{completion_id}* approved—{engager_id} scores ₦{earnings}! 💰", parse_mode='Markdown')
-                await application.bot.send_message(
-                    chat_id=int(engager_id),
-                    text=f"🏆 Task *{task_id}* approved! You bagged ₦{earnings} + 10 XP—check /balance!",
-                    parse_mode='Markdown'
-                )
-                await update_admin_dashboard(query)
-        elif data.startswith('admin_reject_task_'):
-            completion_id = data.replace('admin_reject_task_', '')
-            if completion_id in users['pending_task_completions']:
-                completion = users['pending_task_completions'].pop(completion_id)
-                engager_id = completion['engager_id']
-                task_id = completion['task_id']
-                if task_id in users['engagers'][engager_id].get('claims', []):
-                    users['engagers'][engager_id]['claims'].remove(task_id)
-                await save_users()
-                await query.message.edit_text(f"Task *{completion_id}* nixed! 🚫 Back to the drawing board!", parse_mode='Markdown')
-                await application.bot.send_message(
-                    chat_id=int(engager_id),
-                    text=f"😬 Task *{task_id}* got rejected—chat with support for the tea!",
-                    parse_mode='Markdown'
-                )
-                await update_admin_dashboard(query)
-        elif data.startswith('approve_payout_'):
-            target_user_id = data.replace('approve_payout_', '')
-            if target_user_id in users['engagers'] and users['engagers'][target_user_id].get('awaiting_payout'):
-                user_data = users['engagers'][target_user_id]
-                amount = user_data['earnings'] + user_data['signup_bonus']
-                user_data['earnings'] = 0
-                user_data['signup_bonus'] = 0
-                user_data['awaiting_payout'] = False
-                await save_users()
-                await query.message.edit_text(f"Payout of ₦{amount} for *{target_user_id}* sent—cha-ching! 💸", parse_mode='Markdown')
-                await application.bot.send_message(
-                    chat_id=int(target_user_id),
-                    text=f"💰 Your ₦{amount} payout just dropped—check your bank, baller!",
-                    parse_mode='Markdown'
-                )
-                await update_admin_dashboard(query)
-        elif data.startswith('reject_payout_'):
-            target_user_id = data.replace('reject_payout_', '')
-            if target_user_id in users['engagers'] and users['engagers'][target_user_id].get('awaiting_payout'):
-                users['engagers'][target_user_id]['awaiting_payout'] = False
-                await save_users()
-                await query.message.edit_text(f"Payout for *{target_user_id}* denied! 🚫 Tough love!", parse_mode='Markdown')
-                await application.bot.send_message(
-                    chat_id=int(target_user_id),
-                    text=f"😕 Your payout got a no-go—hit up support for deets!",
-                    parse_mode='Markdown'
-                )
-                await update_admin_dashboard(query)
-        elif data.startswith('priority_'):
-            order_id = data.replace('priority_', '')
-            if order_id in users['active_orders']:
-                users['active_orders'][order_id]['priority'] = True
-                await save_users()
-                await query.message.edit_text(f"Order *{order_id}* bumped to the front—VIP style! ⏫", parse_mode='Markdown')
-                await update_admin_dashboard(query)
-        elif data.startswith('cancel_order_'):
-            order_id = data.replace('cancel_order_', '')
-            if order_id in users['active_orders']:
-                order = users['active_orders'].pop(order_id)
-                client_id = order['client_id']
-                await save_users()
-                await query.message.edit_text(f"Order *{order_id}* zapped—gone for good! 🚫", parse_mode='Markdown')
-                await application.bot.send_message(
-                    chat_id=int(client_id),
-                    text=f"😱 Your order *{order_id}* got canceled by the boss—reach out to support!",
-                    parse_mode='Markdown'
-                )
-                await update_admin_dashboard(query)
-        elif data == 'admin_dashboard':
-            await update_admin_dashboard(query)
+                outcome = apply_payout_approval(item_id) if approve else (0 if apply_payout_rejection(item_id) else None)
+        except Exception as e:
+            failed += 1
+            logger.error(f"Bulk review could not handle {item_id}: {e}", exc_info=True)
+            continue
+        if outcome is None:
+            skipped += 1
+        elif kind == 't':
+            tally = per_engager.setdefault(outcome['engager_id'], [0, 0])
+            tally[0] += 1
+            tally[1] += TASK_REWARD if approve else 0
+            if approve and outcome['completed_order']:
+                completed_orders.append(outcome)
+        else:
+            per_engager[item_id] = [1, outcome]
+    if per_engager:
+        await flush_users()
 
-    except Exception as e:
-        logger.error(f"Admin button error: {e}", exc_info=True)
-        await query.message.edit_text(f"Button’s acting up, fam! 😵 Error: {str(e)}—tell the tech crew!", parse_mode='Markdown')
+    for engager_id, (count, naira) in per_engager.items():
+        if kind == 't' and approve:
+            text = f"🏆 {count} task{'s' if count > 1 else ''} approved! You bagged ₦{naira} + {count * TASK_XP} XP—check /balance!"
+        elif kind == 't':
+            text = f"😬 {count} task{'s' if count > 1 else ''} got rejected—chat with support for the tea!"
+        elif approve:
+            text = f"💰 Your ₦{naira} payout just dropped—check your bank, baller!"
+        else:
+            text = "😕 Your payout got a no-go—hit up support for deets!"
+        enqueue_message(chat_id=int(engager_id), text=text)
+    for outcome in completed_orders:
+        notify_completed_order(outcome)
 
-async def update_admin_dashboard(query: CallbackQuery) -> None:
-    pending_orders = len(users.get('pending_orders', {}))
-    active_orders = len(users.get('active_orders', {}))
-    pending_tasks = len(users.get('pending_task_completions', {}))
-    pending_payouts = len([u for u in users['engagers'].values() if u.get('awaiting_payout')])
-    dashboard_text = (
-        "🛠️ *Admin Command Center* 🛠️\n\n"
-        f"📈 *Pending Orders*: {pending_orders} {'✅' if pending_orders == 0 else '⏳'}\n"
-        f"🚀 *Active Orders*: {active_orders} {'✅' if active_orders == 0 else '✈️'}\n"
-        f"📋 *Pending Tasks*: {pending_tasks} {'✅' if pending_tasks == 0 else '⏳'}\n"
-        f"💸 *Pending Payouts*: {pending_payouts} {'✅' if pending_payouts == 0 else '⏳'}"
-    )
-    await query.message.edit_text(dashboard_text, parse_mode='Markdown', reply_markup=InlineKeyboardMarkup([
-        [InlineKeyboardButton("Approve Order ✅", callback_data='admin_approve_order'),
-         InlineKeyboardButton("Reject Order ❌", callback_data='admin_reject_order')],
-        [InlineKeyboardButton("Approve Task ✅", callback_data='admin_approve_task'),
-         InlineKeyboardButton("Reject Task ❌", callback_data='admin_reject_task')],
-        [InlineKeyboardButton("Approve Payout ✅", callback_data='admin_approve_payout'),
-         InlineKeyboardButton("Reject Payout ❌", callback_data='admin_reject_payout')],
-        [InlineKeyboardButton("Set Priority ⏫", callback_data='admin_set_priority'),
-         InlineKeyboardButton("Cancel Order 🚫", callback_data='admin_cancel_order')],
-        [InlineKeyboardButton("Generate Code 🎟️", callback_data='admin_generate_code')]
+    done = sum(count for count, _ in per_engager.values())
+    naira = sum(amount for _, amount in per_engager.values())
+    noun = 'task' if kind == 't' else 'payout'
+    summary = f"{'✅ Approved' if approve else '🚫 Rejected'} {done} {noun}{'s' if done != 1 else ''}"
+    if kind == 't':
+        summary += f" from {len(per_engager)} engager{'s' if len(per_engager) != 1 else ''}"
+    if approve and done:
+        summary += f"—₦{naira} {'credited' if kind == 't' else 'paid out'}"
+    if skipped:
+        summary += f"\n⏭️ {skipped} already handled, skipped"
+    if failed:
+        summary += f"\n⚠️ {failed} failed, skipped—check the logs"
+    logger.info(f"Bulk review: {summary}")
+    return summary
+
+def bulk_picker_row(kind: str, verb: str) -> list:
+    icon = '✅' if verb == 'a' else '❌'
+    return [
+        InlineKeyboardButton(f"{icon} Next {n}", callback_data=cb('bk', kind, verb, 'next', n)) for n in BULK_SIZES
+    ] + [InlineKeyboardButton("☑️ Select", callback_data=cb('bk', kind, 'pick'))]
+
+async def show_selection_picker(query: CallbackQuery, admin_id: str, kind: str, cursor=None, backwards: bool = False) -> None:
+    list_name = bulk_list_name(kind)
+    index = picker_index(list_name)
+    selected = review_selections.setdefault(admin_id, {'t': set(), 'p': set()})[kind]
+    selected.intersection_update(index.position_of.keys())  # drop items reviewed elsewhere
+    page, has_prev, has_next = cursor_page(index, cursor, backwards)
+    if not page:
+        await query.message.edit_text("Nothing left to review! ✅ All clear!", reply_markup=InlineKeyboardMarkup([
+            [InlineKeyboardButton("Back to Dashboard", callback_data=cb('ad'))]
+        ]))
+        return
+    page_start = page[0][0] - 1
+    keyboard = [
+        [InlineKeyboardButton(f"{'☑️' if key in selected else '⬜'} {picker_label(list_name, key)}",
+                              callback_data=cb('sl', kind, position, page_start))]
+        for position, key in page
+    ]
+    nav = page_nav_row(f's{kind}', page, has_prev, has_next)
+    if nav:
+        keyboard.append(nav)
+    keyboard.append([
+        InlineKeyboardButton(f"✅ Approve {len(selected)}", callback_data=cb('bk', kind, 'a', 'sel')),
+        InlineKeyboardButton(f"❌ Reject {len(selected)}", callback_data=cb('bk', kind, 'r', 'sel')),
+    ])
+    keyboard.append([InlineKeyboardButton("Back to Dashboard", callback_data=cb('ad'))])
+    noun = 'screenshots' if kind == 't' else 'payouts'
+    await query.message.edit_text(f"Tap {noun} to pick ‘em, then fire in one go! ☑️", reply_markup=InlineKeyboardMarkup(keyboard))
+
+async def toggle_selection(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str,
+                           kind: str, position: str, page_start: str) -> None:
+    key = picker_index(bulk_list_name(kind)).key_at(int(position))
+    selected = review_selections.setdefault(user_id, {'t': set(), 'p': set()})[kind]
+    if key is not None:
+        selected.symmetric_difference_update({key})
+    await show_selection_picker(update.callback_query, user_id, kind, int(page_start))
+
+async def handle_bulk_button(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str,
+                             kind: str, verb: str, mode: str = None, arg: str = None) -> None:
+    query = update.callback_query
+    if verb == 'pick':
+        await show_selection_picker(query, user_id, kind)
+        return
+    approve = verb == 'a'
+    if mode == 'next':
+        index = picker_index(bulk_list_name(kind))
+        item_ids = [key for _, key in itertools.islice(index.iter_after(), int(arg))]
+    elif mode == 'eng' and kind == 't':
+        item_ids = [cid for cid, c in users['pending_task_completions'].items() if c['engager_id'] == arg]
+    elif mode == 'sel':
+        selected = review_selections.setdefault(user_id, {'t': set(), 'p': set()})[kind]
+        item_ids = sorted(selected, key=lambda key: picker_index(bulk_list_name(kind)).position_of.get(key, 0))
+        selected.clear()
+    else:
+        return
+    summary = await run_bulk_review(kind, approve, item_ids)
+    await query.message.edit_text(summary, reply_markup=InlineKeyboardMarkup([
+        [InlineKeyboardButton("Back to Dashboard", callback_data=cb('ad'))]
     ]))
 
-async def update_admin_dashboard(query: CallbackQuery) -> None:
+# Admin pickers: code -> (list, prompt, empty-list reply). Each code is also the
+# route its item buttons go to, e.g. "ao:<order>".
+ADMIN_PICKERS = {
+    'ao': ('pending_orders', "Pick an order to green-light! 🚀", "No orders in the queue, chief! ✅ All quiet!"),
+    'ro': ('pending_orders', "Which order’s getting the boot? 🚫", "Nada to nix here! ✅ Queue’s empty!"),
+    'at': ('completions', "Which task gets the thumbs-up? 👍", "No tasks waiting, boss! ✅ All done!"),
+    'rt': ('completions', "Which task’s outta here? 🚫", "No tasks to toss! ✅ All clear!"),
+    'ap': ('payouts', "Who’s getting paid today? 💸", "No payouts to bless! ✅ Cash flow’s chill!"),
+    'rp': ('payouts', "Who’s payout’s getting the axe? 🚫", "No payouts to deny! ✅ All good!"),
+    'pr': ('active_orders', "Which order’s jumping the line? ⏫", "No orders to juice up! ✅ All quiet!"),
+    'co': ('active_orders', "Which order’s biting the dust? 🚫", "No orders to zap! ✅ All chill!"),
+}
+BULK_PICKERS = {'at': ('t', 'a'), 'rt': ('t', 'r'), 'ap': ('p', 'a'), 'rp': ('p', 'r')}
+
+def picker_label(list_name: str, key: str) -> str:
+    if list_name == 'completions':
+        return f"Task {key}"
+    if list_name == 'payouts':
+        return f"User {key}: ₦{payout_queue.amounts[key]}"
+    return f"Order {key}"
+
+async def show_admin_picker(query: CallbackQuery, code: str, cursor=None, backwards: bool = False) -> None:
+    list_name, prompt, empty_reply = ADMIN_PICKERS[code]
+    page, has_prev, has_next = cursor_page(picker_index(list_name), cursor, backwards)
+    if not page:
+        await query.message.edit_text(empty_reply)
+        return
+    keyboard = [
+        [InlineKeyboardButton(picker_label(list_name, key), callback_data=cb(code, key))]
+        for _, key in page
+    ]
+    nav = page_nav_row(code, page, has_prev, has_next)
+    if nav:
+        keyboard.append(nav)
+    if code in BULK_PICKERS:
+        keyboard.append(bulk_picker_row(*BULK_PICKERS[code]))
+    await query.message.edit_text(prompt, reply_markup=InlineKeyboardMarkup(keyboard))
+
+async def open_admin_picker(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str, code: str) -> None:
+    if code in ADMIN_PICKERS:
+        await show_admin_picker(update.callback_query, code)
+
+async def handle_page_button(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str,
+                             code: str, cursor: str, backwards: bool = False) -> None:
+    query = update.callback_query
+    if code == 'tk':
+        if user_id not in users['engagers']:
+            await query.message.edit_text("Join the engager crew first! 💼 Use /engager to jump in!")
+            return
+        reply_markup = task_page_markup(user_id, decode_cursor(cursor), backwards)
+        if not reply_markup:
+            await query.message.edit_text("No tasks up for grabs right now! ⏰ Check back soon!")
+            return
+        await query.message.edit_text(TASKS_HEADER, reply_markup=reply_markup, parse_mode='Markdown')
+    elif code in ADMIN_PICKERS or code in ('st', 'sp'):
+        if user_id not in ADMINS:
+            await query.message.edit_text("Admin zone, fam! 🛡️ No entry unless you’re the boss!")
+            return
+        if code in ADMIN_PICKERS:
+            await show_admin_picker(query, code, decode_cursor(cursor), backwards)
+        else:
+            await show_selection_picker(query, user_id, code[1], decode_cursor(cursor), backwards)
+
+# Admin actions
+async def admin_dashboard_button(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str) -> None:
+    await update_admin_dashboard(update.callback_query)
+
+async def admin_generate_code(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str) -> None:
+    query = update.callback_query
+    code = generate_admin_code()
+    users['pending_admin_actions'][code] = {'type': 'admin_code', 'used': False}
+    await save_users()
+    await query.message.edit_text(
+        f"🎟️ Fresh admin code: *{code}*\n"
+        "Perfect for bonuses or VIP tricks—use it wisely!",
+        parse_mode='Markdown'
+    )
+    await update_admin_dashboard(query)
+
+async def admin_approve_order(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str, order_id: str) -> None:
+    query = update.callback_query
+    if order_id in users['pending_orders']:
+        order = users['pending_orders'].pop(order_id)
+        picker_lists['pending_orders'].discard(order_id)
+        client_id = order['client_id']
+        users['active_orders'][order_id] = order
+        task_index.open_order(order_id, order['platform'])
+        if str(client_id) in users['clients']:
+            users['clients'][str(client_id)]['step'] = 'active'  # Changed to 'active' for clarity
+        await save_users()
+        await query.message.edit_text(
+            f"Order *{order_id}* is live—boom! 💥\n"
+            "Next: Generate tasks for engagers!",
+            parse_mode='Markdown',
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("Generate Tasks 📋", callback_data=cb('gt', order_id))],
+                [InlineKeyboardButton("Back to Dashboard", callback_data=cb('ad'))]
+            ])
+        )
+        enqueue_message(
+            chat_id=int(client_id),
+            text=f"🎉 Your order *{order_id}* is approved and rolling! 🚀 Check /status!",
+            parse_mode='Markdown'
+        )
+    elif order_id in users['active_orders']:
+        await query.message.edit_text(f"Order *{order_id}* already vibin’—no double dip! ✅", parse_mode='Markdown')
+
+async def admin_reject_order(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str, order_id: str) -> None:
+    query = update.callback_query
+    if order_id in users['pending_orders']:
+        order = users['pending_orders'].pop(order_id)
+        picker_lists['pending_orders'].discard(order_id)
+        client_id = order['client_id']
+        if str(client_id) in users['clients']:
+            del users['clients'][str(client_id)]
+        await save_users()
+        await query.message.edit_text(f"Order *{order_id}* axed! 🚫 Tough call, boss!", parse_mode='Markdown')
+        enqueue_message(
+            chat_id=int(client_id),
+            text=f"😕 Your order *{order_id}* got the boot—hit up support or retry with /client!",
+            parse_mode='Markdown'
+        )
+        await update_admin_dashboard(query)
+
+async def admin_generate_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str, order_id: str) -> None:
+    query = update.callback_query
+    if order_id in users['active_orders']:
+        order = users['active_orders'][order_id]
+        # Tasks are just the order's per-metric counters; claims lease units off them.
+        units = sum(order_capacity(order).values())
+        if units:
+            task_index.resume(order_id)
+        await save_users()
+        await query.message.edit_text(
+            f"Tasks for order *{order_id}* generated—{units} vibes ready! 📋\n"
+            "Engagers can grab ‘em with /tasks!",
+            parse_mode='Markdown',
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("Back to Dashboard", callback_data=cb('ad'))]
+            ])
+        )
+
+async def admin_approve_task(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str, completion_id: str) -> None:
+    query = update.callback_query
+    outcome = apply_task_approval(completion_id)
+    if outcome:
+        await flush_users()
+        engager_id, task_id = outcome['engager_id'], outcome['task_id']
+        await query.message.edit_text(f"Task *{completion_id}* approved—{engager_id} scores ₦{TASK_REWARD}! 💰", parse_mode='Markdown')
+        enqueue_message(
+            chat_id=int(engager_id),
+            text=f"🏆 Task *{task_id}* approved! You bagged ₦{TASK_REWARD} + {TASK_XP} XP—check /balance!",
+            parse_mode='Markdown'
+        )
+        notify_completed_order(outcome)
+        await update_admin_dashboard(query)
+
+async def admin_reject_task(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str, completion_id: str) -> None:
+    query = update.callback_query
+    outcome = apply_task_rejection(completion_id)
+    if outcome:
+        await save_users()
+        engager_id, task_id = outcome['engager_id'], outcome['task_id']
+        await query.message.edit_text(f"Task *{completion_id}* nixed! 🚫 Back to the drawing board!", parse_mode='Markdown')
+        enqueue_message(
+            chat_id=int(engager_id),
+            text=f"😬 Task *{task_id}* got rejected—chat with support for the tea!",
+            parse_mode='Markdown'
+        )
+        await update_admin_dashboard(query)
+
+async def admin_approve_payout(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str, target_user_id: str) -> None:
+    query = update.callback_query
+    amount = apply_payout_approval(target_user_id)
+    if amount is not None:
+        await flush_users()
+        await query.message.edit_text(f"Payout of ₦{amount} for *{target_user_id}* sent—cha-ching! 💸", parse_mode='Markdown')
+        enqueue_message(
+            chat_id=int(target_user_id),
+            text=f"💰 Your ₦{amount} payout just dropped—check your bank, baller!",
+            parse_mode='Markdown'
+        )
+        await update_admin_dashboard(query)
+
+async def admin_reject_payout(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str, target_user_id: str) -> None:
+    query = update.callback_query
+    if apply_payout_rejection(target_user_id):
+        await flush_users()
+        await query.message.edit_text(f"Payout for *{target_user_id}* denied! 🚫 Tough love!", parse_mode='Markdown')
+        enqueue_message(
+            chat_id=int(target_user_id),
+            text=f"😕 Your payout got a no-go—hit up support for deets!",
+            parse_mode='Markdown'
+        )
+        await update_admin_dashboard(query)
+
+async def admin_set_priority(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str, order_id: str) -> None:
+    query = update.callback_query
+    if order_id in users['active_orders']:
+        users['active_orders'][order_id]['priority'] = True
+        task_index.reposition(order_id)
+        await save_users()
+        await query.message.edit_text(f"Order *{order_id}* bumped to the front—VIP style! ⏫", parse_mode='Markdown')
+        await update_admin_dashboard(query)
+
+async def admin_cancel_order(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: str, order_id: str) -> None:
+    query = update.callback_query
+    if order_id in users['active_orders']:
+        order = users['active_orders'].pop(order_id)
+        task_index.close_order(order_id)
+        client_id = order['client_id']
+        await save_users()
+        await query.message.edit_text(f"Order *{order_id}* zapped—gone for good! 🚫", parse_mode='Markdown')
+        enqueue_message(
+            chat_id=int(client_id),
+            text=f"😱 Your order *{order_id}* got canceled by the boss—reach out to support!",
+            parse_mode='Markdown'
+        )
+        await update_admin_dashboard(query)
+
+# Admin dashboard
+# Every figure comes from an index maintained at the transition that changes it,
+# so rendering never walks the collections. recount_dashboard() checks those
+# indexes against a full recount on a schedule and rebuilds them on drift.
+DASHBOARD_CHECK_INTERVAL = int(os.getenv("DASHBOARD_CHECK_INTERVAL", 3600))
+DASHBOARD_PAYOUT_PREVIEW = 5
+
+def dashboard_counts(payouts: bool = True) -> dict:
+    counts = {
+        'pending_orders': len(picker_lists['pending_orders']),
+        'active_orders': len(task_index.open),
+        'pending_tasks': len(picker_lists['completions']),
+    }
+    if payouts:
+        counts.update(pending_payouts=len(payout_queue), payout_total=payout_queue.total)
+    return counts
+
+def recount_dashboard() -> dict:
+    """Compare the maintained counters with a full recount; returns {name: (kept, actual)} for any drift."""
+    actual = {
+        'pending_orders': len(users['pending_orders']),
+        'active_orders': len(users['active_orders']),
+        'pending_tasks': len(users['pending_task_completions']),
+    }
+    payouts = payout_queue.loaded()  # a queue nobody has used yet has nothing to drift from
+    if payouts:
+        owed = [
+            v.get('earnings', 0) + v.get('signup_bonus', 0)
+            for v in users['engagers'].values() if v.get('awaiting_payout')
+        ]
+        actual.update(pending_payouts=len(owed), payout_total=sum(owed))
+    kept = dashboard_counts(payouts)
+    drift = {name: (kept[name], actual[name]) for name in actual if kept[name] != actual[name]}
+    if drift:
+        logger.warning(f"Dashboard counters drifted, rebuilding: {drift}")
+        task_index.rebuild(users)
+        rebuild_picker_lists(users)
+    return drift
+
+async def check_dashboard_counters() -> None:
+    recount_dashboard()
+
+ADMIN_DASHBOARD_KEYBOARD = [
+    [InlineKeyboardButton("Approve Order ✅", callback_data=cb('pk', 'ao')),
+     InlineKeyboardButton("Reject Order ❌", callback_data=cb('pk', 'ro'))],
+    [InlineKeyboardButton("Approve Task ✅", callback_data=cb('pk', 'at')),
+     InlineKeyboardButton("Reject Task ❌", callback_data=cb('pk', 'rt'))],
+    [InlineKeyboardButton("Approve Payout ✅", callback_data=cb('pk', 'ap')),
+     InlineKeyboardButton("Reject Payout ❌", callback_data=cb('pk', 'rp'))],
+    [InlineKeyboardButton("Set Priority ⏫", callback_data=cb('pk', 'pr')),
+     InlineKeyboardButton("Cancel Order 🚫", callback_data=cb('pk', 'co'))],
+    [InlineKeyboardButton("Generate Code 🎟️", callback_data=cb('gc'))]
+]
+
+def admin_dashboard_text(list_payouts: bool = False) -> str:
+    counts = dashboard_counts()
     message = "🛠️ *Admin Command Center* 🛠️\n\n"
     message += "📊 *Pending Orders*:\n"
-    pending_orders = users.get('pending_orders', {})
-    message += f"{len(pending_orders)} waiting\n" if pending_orders else "All clear! ✅\n"
+    message += f"{counts['pending_orders']} waiting\n" if counts['pending_orders'] else "All clear! ✅\n"
     message += "\n📋 *Pending Tasks*:\n"
-    pending_tasks = users.get('pending_task_completions', {})
-    message += f"{len(pending_tasks)} up for review\n" if pending_tasks else "Nada here! ✅\n"
+    message += f"{counts['pending_tasks']} up for review\n" if counts['pending_tasks'] else "Nada here! ✅\n"
     message += "\n💸 *Pending Payouts*:\n"
-    pending_payouts = {k: v for k, v in users['engagers'].items() if v.get('awaiting_payout')}
-    message += f"{len(pending_payouts)} ready\n" if pending_payouts else "No cash-outs yet! ✅\n"
+    if not counts['pending_payouts']:
+        message += "No cash-outs yet! ✅\n"
+    elif list_payouts:
+        message += f"{counts['pending_payouts']} ready to roll (₦{counts['payout_total']}):\n"
+        for _, uid in itertools.islice(payout_queue.index.iter_after(), DASHBOARD_PAYOUT_PREVIEW):
+            message += f"- User {uid}: ₦{payout_queue.amounts[uid]}\n"
+        if counts['pending_payouts'] > DASHBOARD_PAYOUT_PREVIEW:
+            message += f"…and {counts['pending_payouts'] - DASHBOARD_PAYOUT_PREVIEW} more\n"
+    else:
+        message += f"{counts['pending_payouts']} ready (₦{counts['payout_total']})\n"
     message += "\n🚀 *Active Orders*:\n"
-    active_orders = users.get('active_orders', {})
-    message += f"{len(active_orders)} in flight\n" if active_orders else "All quiet! ✅\n"
-    keyboard = [
-        [InlineKeyboardButton("Approve Order ✅", callback_data="admin_approve_order"),
-         InlineKeyboardButton("Reject Order ❌", callback_data="admin_reject_order")],
-        [InlineKeyboardButton("Approve Task ✅", callback_data="admin_approve_task"),
-         InlineKeyboardButton("Reject Task ❌", callback_data="admin_reject_task")],
-        [InlineKeyboardButton("Approve Payout ✅", callback_data="admin_approve_payout"),
-         InlineKeyboardButton("Reject Payout ❌", callback_data="admin_reject_payout")],
-        [InlineKeyboardButton("Set Priority ⏫", callback_data="admin_set_priority"),
-         InlineKeyboardButton("Cancel Order 🚫", callback_data="admin_cancel_order")],
-        [InlineKeyboardButton("Generate Code 🎟️", callback_data="admin_generate_code")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    message += f"{counts['active_orders']} in flight\n" if counts['active_orders'] else "All quiet! ✅\n"
+    return message
+
+async def update_admin_dashboard(query: CallbackQuery) -> None:
+    reply_markup = InlineKeyboardMarkup(ADMIN_DASHBOARD_KEYBOARD)
     try:
-        await query.message.edit_text(message, reply_markup=reply_markup, parse_mode='Markdown')
+        await query.message.edit_text(admin_dashboard_text(), reply_markup=reply_markup, parse_mode='Markdown')
     except Exception as e:
         logger.error(f"Failed to update admin dashboard: {e}")
 # Part 3: Remaining Commands and Message Handler for vibelift_bot.py
@@ -941,6 +2842,26 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     else:
         await update.message.reply_text("No status yet, newbie! 😏 Pick a role with /start!")
 
+TASKS_HEADER = (
+    "🏆 *Task Time!* 🏆\n"
+    "Snag a task, earn ₦20 + 10 XP—let’s hustle!"
+)
+
+def task_page_markup(user_id: str, cursor=None, backwards: bool = False):
+    page, has_prev, has_next = task_index.available(user_id, cursor, backwards)
+    if not page:
+        return None
+    keyboard = [] if has_prev else [[InlineKeyboardButton("⚡ Auto-pick my best task", callback_data=cb('tn'))]]
+    keyboard += [
+        [InlineKeyboardButton(f"{'⏫ ' if users['active_orders'][task_id].get('priority') else ''}Task {task_id} - ₦20",
+                              callback_data=cb('tc', task_id))]
+        for _, task_id in page
+    ]
+    nav = page_nav_row('tk', page, has_prev, has_next)
+    if nav:
+        keyboard.append(nav)
+    return InlineKeyboardMarkup(keyboard)
+
 async def tasks(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_id = str(update.effective_user.id)
     logger.info(f"Received /tasks command from user {user_id}")
@@ -948,6 +2869,14 @@ async def tasks(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if query:
         await query.answer()
 
+    if not check_rate_limit(user_id, action='tasks'):
+        reply = random.choice(witty_rate_limit)
+        if query:
+            await query.message.edit_text(reply)
+        else:
+            await update.message.reply_text(reply)
+        return
+
     if user_id not in users['engagers']:
         message_text = "Join the engager crew first! 💼 Use /engager to jump in!"
         if query:
@@ -956,8 +2885,8 @@ async def tasks(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             await update.message.reply_text(message_text)
         return
 
-    active_orders = users.get('active_orders', {})
-    if not active_orders:
+    reply_markup = task_page_markup(user_id)
+    if not reply_markup:
         message_text = "No tasks up for grabs right now! ⏰ Check back soon!"
         if query:
             await query.message.edit_text(message_text)
@@ -965,16 +2894,7 @@ async def tasks(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             await update.message.reply_text(message_text)
         return
 
-    keyboard = [
-        [InlineKeyboardButton(f"Task {task_id} - ₦20", callback_data=f"task_claim_{task_id}")]
-        for task_id in active_orders.keys()
-        if task_id not in users['engagers'][user_id].get('claims', [])
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    message_text = (
-        "🏆 *Task Time!* 🏆\n"
-        "Snag a task, earn ₦20 + 10 XP—let’s hustle!"
-    )
+    message_text = TASKS_HEADER
     if query:
         await query.message.edit_text(message_text, reply_markup=reply_markup, parse_mode='Markdown')
     else:
@@ -987,8 +2907,8 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await update.message.reply_text("Nothing to ditch, fam! 🌟 Start with /start!")
         return
     keyboard = [
-        [InlineKeyboardButton("Yes ✅", callback_data=f"cancel_yes"),
-         InlineKeyboardButton("No ❌", callback_data=f"cancel_no")]
+        [InlineKeyboardButton("Yes ✅", callback_data=cb('cx', 'yes')),
+         InlineKeyboardButton("No ❌", callback_data=cb('cx', 'no'))]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
     await update.message.reply_text(
@@ -1017,38 +2937,27 @@ async def admin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not check_rate_limit(str(user_id), action='admin'):
         await update.message.reply_text(random.choice(witty_rate_limit))
         return
-    message = "🛠️ *Admin Command Center* 🛠️\n\n"
-    message += "📊 *Pending Orders*:\n"
-    pending_orders = users.get('pending_orders', {})
-    message += f"{len(pending_orders)} waiting\n" if pending_orders else "All clear! ✅\n"
-    message += "\n📋 *Pending Tasks*:\n"
-    pending_tasks = users.get('pending_task_completions', {})
-    message += f"{len(pending_tasks)} up for review\n" if pending_tasks else "Nada here! ✅\n"
-    message += "\n💸 *Pending Payouts*:\n"
-    pending_payouts = {k: v for k, v in users['engagers'].items() if v.get('awaiting_payout')}
-    if pending_payouts:
-        message += f"{len(pending_payouts)} ready to roll:\n"
-        for uid in pending_payouts:
-            amount = pending_payouts[uid]['earnings'] + pending_payouts[uid]['signup_bonus']
-            message += f"- User {uid}: ₦{amount}\n"
-    else:
-        message += "No cash-outs yet! ✅\n"
-    message += "\n🚀 *Active Orders*:\n"
-    active_orders = users.get('active_orders', {})
-    message += f"{len(active_orders)} in flight\n" if active_orders else "All quiet! ✅\n"
-    keyboard = [
-        [InlineKeyboardButton("Approve Order ✅", callback_data="admin_approve_order"),
-         InlineKeyboardButton("Reject Order ❌", callback_data="admin_reject_order")],
-        [InlineKeyboardButton("Approve Task ✅", callback_data="admin_approve_task"),
-         InlineKeyboardButton("Reject Task ❌", callback_data="admin_reject_task")],
-        [InlineKeyboardButton("Approve Payout ✅", callback_data="admin_approve_payout"),
-         InlineKeyboardButton("Reject Payout ❌", callback_data="admin_reject_payout")],
-        [InlineKeyboardButton("Set Priority ⏫", callback_data="admin_set_priority"),
-         InlineKeyboardButton("Cancel Order 🚫", callback_data="admin_cancel_order")],
-        [InlineKeyboardButton("Generate Code 🎟️", callback_data="admin_generate_code")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await update.message.reply_text(message, reply_markup=reply_markup, parse_mode='Markdown')
+    reply_markup = InlineKeyboardMarkup(ADMIN_DASHBOARD_KEYBOARD)
+    await update.message.reply_text(admin_dashboard_text(list_payouts=True), reply_markup=reply_markup, parse_mode='Markdown')
+
+async def announce(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    user_id = str(update.effective_user.id)
+    logger.info(f"Received /announce command from user {user_id}")
+    if user_id not in ADMINS:
+        await update.message.reply_text("Admin zone, fam! 🛡️ No entry unless you’re the boss!")
+        return
+    text = ' '.join(context.args) if context.args else ''
+    if not text:
+        await update.message.reply_text("What’s the news, boss? 📣 Use: `/announce your message`", parse_mode='Markdown')
+        return
+    recipients = list(set(users['clients'].keys()) | set(users['engagers'].keys()))
+    await update.message.reply_text(f"📣 Blasting to {len(recipients)} vibers—I’ll report back when it’s done!")
+    asyncio.create_task(run_announcement(update.effective_chat.id, recipients, text))
+
+async def run_announcement(chat_id: int, recipients: list, text: str) -> None:
+    results = await broadcast(recipients, f"📣 {text}")
+    logger.info(f"Announcement finished: {summarize_broadcast(results)}")
+    enqueue_message(chat_id=chat_id, text=f"📣 Announcement done: {summarize_broadcast(results)}")
 
 async def balance(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_id = str(update.effective_user.id)
@@ -1070,6 +2979,9 @@ async def balance(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 async def withdraw(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_id = str(update.effective_user.id)
     logger.info(f"Received /withdraw command from user {user_id}")
+    if not check_rate_limit(user_id, action='withdraw'):
+        await update.message.reply_text(random.choice(witty_rate_limit))
+        return
     if user_id not in users['engagers']:
         await update.message.reply_text("You’re not an engager yet, fam! 💼 Join with /engager!")
         return
@@ -1082,7 +2994,8 @@ async def withdraw(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await update.message.reply_text("Need at least ₦1000 to cash out, hustler! 🏆 Keep grinding!")
         return
     user_data['awaiting_payout'] = True
-    await save_users()
+    payout_queue.add(user_id, total_earnings)
+    await flush_users()
     await update.message.reply_text(
         f"Your ₦{total_earnings} withdrawal is in the VIP line for review! 💸\n"
         "We’ll ping you when it’s a done deal!"
@@ -1093,11 +3006,11 @@ async def withdraw(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         f"Amount: ₦{total_earnings}"
     )
     keyboard = [
-        [InlineKeyboardButton("Approve ✅", callback_data=f"approve_payout_{user_id}"),
-         InlineKeyboardButton("Reject ❌", callback_data=f"reject_payout_{user_id}")]
+        [InlineKeyboardButton("Approve ✅", callback_data=cb('ap', user_id)),
+         InlineKeyboardButton("Reject ❌", callback_data=cb('rp', user_id))]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
-    await application.bot.send_message(
+    enqueue_message(
         chat_id=ADMIN_GROUP_ID,
         text=message,
         reply_markup=reply_markup,
@@ -1122,22 +3035,97 @@ async def refer(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     )
     await update.message.reply_text(message_text, parse_mode='Markdown')
 
+# Leaderboard
+# Engagers ranked by XP (ties by id) in one sorted list kept up to date wherever
+# XP changes, so a rank is a bisect and the top rows are a slice. The rendered
+# top rows are cached until an update lands inside them. Like the payout queue,
+# the list is built on first use rather than at startup.
+LEADERBOARD_SIZE = 5
+
+class LeaderboardIndex:
+    def __init__(self):
+        self.keys = []  # (-xp, engager_id), ascending
+        self.xp_of = {}
+        self.top_text = None
+        self.source = None  # state still to rank
+
+    def __len__(self):
+        self.ensure()
+        return len(self.keys)
+
+    def rebuild(self, state: dict) -> None:
+        self.__init__()
+        self.source = state
+
+    def ensure(self) -> None:
+        if self.source is not None:
+            state, self.source = self.source, None
+            self.xp_of = {uid: data.get('xp', 0) for uid, data in state['engagers'].items()}
+            self.keys = sorted((-xp, uid) for uid, xp in self.xp_of.items())
+            self.top_text = None
+
+    def _drop(self, engager_id: str) -> bool:
+        """Take the engager out of the ranking; True if they were in the top rows."""
+        xp = self.xp_of.pop(engager_id, None)
+        if xp is None:
+            return False
+        i = bisect.bisect_left(self.keys, (-xp, engager_id))
+        del self.keys[i]
+        return i < LEADERBOARD_SIZE
+
+    def update(self, engager_id: str, xp: int) -> None:
+        self.ensure()
+        if self.xp_of.get(engager_id) == xp:
+            return
+        was_top = self._drop(engager_id)
+        self.xp_of[engager_id] = xp
+        key = (-xp, engager_id)
+        i = bisect.bisect_left(self.keys, key)
+        self.keys.insert(i, key)
+        if was_top or i < LEADERBOARD_SIZE:
+            self.top_text = None
+
+    def remove(self, engager_id: str) -> None:
+        self.ensure()
+        if self._drop(engager_id):
+            self.top_text = None
+
+    def rank(self, engager_id: str):
+        """1-based rank, or None for someone who isn't an engager."""
+        self.ensure()
+        xp = self.xp_of.get(engager_id)
+        if xp is None:
+            return None
+        return bisect.bisect_left(self.keys, (-xp, engager_id)) + 1
+
+    def top(self, size: int = LEADERBOARD_SIZE) -> list:
+        self.ensure()
+        return [(uid, -neg_xp) for neg_xp, uid in self.keys[:size]]
+
+leaderboard_index = LeaderboardIndex()
+
+def leaderboard_top_text() -> str:
+    if leaderboard_index.top_text is None:
+        text = "🏆 *Vibelift Legends* 🏆\n"
+        for i, (uid, xp) in enumerate(leaderboard_index.top(), 1):
+            level = users['engagers'][uid].get('level', 1)
+            text += f"{i}. User {uid} - Level {level} (XP: {xp}) 🌟\n"
+        leaderboard_index.top_text = text
+    return leaderboard_index.top_text
+
 async def leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_id = str(update.effective_user.id)
     logger.info(f"Received /leaderboard command from user {user_id}")
-    top_engagers = sorted(
-        users['engagers'].items(),
-        key=lambda x: x[1].get('xp', 0),
-        reverse=True
-    )[:5]
-    leaderboard_text = "🏆 *Vibelift Legends* 🏆\n"
-    for i, (uid, data) in enumerate(top_engagers, 1):
-        level = data.get('level', 1)
-        xp = data.get('xp', 0)
-        leaderboard_text += f"{i}. User {uid} - Level {level} (XP: {xp}) 🌟\n"
-    your_xp = users['engagers'][user_id].get('xp', 0) if user_id in users['engagers'] else 0
-    your_level = users['engagers'][user_id].get('level', 1) if user_id in users['engagers'] else 1
-    leaderboard_text += f"\nYou: Level {your_level} (XP: {your_xp})—keep climbing! 🚀"
+    leaderboard_text = leaderboard_top_text()
+    rank = leaderboard_index.rank(user_id)
+    if rank is None:
+        leaderboard_text += "\nYou’re not on the board yet—join with /engager and start climbing! 🚀"
+    else:
+        your_data = users['engagers'][user_id]
+        leaderboard_text += (
+            f"\nYou: #{rank} of {len(leaderboard_index)} | Level {your_data.get('level', 1)} "
+            f"(XP: {your_data.get('xp', 0)})—keep climbing! 🚀"
+        )
     await update.message.reply_text(leaderboard_text, parse_mode='Markdown')
 
 # Message Handler
@@ -1151,13 +3139,27 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     if user_id in users['engagers']:
         user_data = users['engagers'][user_id]
         current_task = user_data.get('current_task')
+        lease_id = user_data.get('current_lease')
+        if current_task and lease_id and lease_id not in users['task_leases']:
+            user_data['current_task'] = None
+            user_data['current_lease'] = None
+            await save_users()
+            await message.reply_text("⌛ That claim timed out—grab a fresh one with /tasks!")
+            return
         if current_task and photo and not text:  # Screenshot-only submission
             completion_id = str(uuid.uuid4())
-            users['pending_task_completions'][completion_id] = {
+            completion = {
                 'engager_id': user_id,
                 'task_id': current_task,
                 'screenshot': photo[-1].file_id
             }
+            lease = lease_book.settle(lease_id) if lease_id else None
+            if lease:
+                completion['metric'] = lease['metric']
+                completion['unit'] = lease['unit']
+            users['pending_task_completions'][completion_id] = completion
+            user_data['current_lease'] = None
+            picker_lists['completions'].add(completion_id)
             user_data['current_task'] = None  # Clear current task
             await save_users()
             await message.reply_text(
@@ -1167,14 +3169,15 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             task_message = (
                 f"📸 *Task Submission* (ID: {completion_id}) 📸\n"
                 f"Engager ID: {user_id}\n"
-                f"Task ID: {current_task}"
+                f"Task ID: {completion.get('unit', current_task)}"
             )
             keyboard = [
-                [InlineKeyboardButton("Approve ✅", callback_data=f"admin_approve_task_{completion_id}"),
-                 InlineKeyboardButton("Reject ❌", callback_data=f"admin_reject_task_{completion_id}")]
+                [InlineKeyboardButton("Approve ✅", callback_data=cb('at', completion_id)),
+                 InlineKeyboardButton("Reject ❌", callback_data=cb('rt', completion_id))],
+                [InlineKeyboardButton("✅ All from this engager", callback_data=cb('bk', 't', 'a', 'eng', user_id))]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
-            await application.bot.send_photo(
+            enqueue_photo(
                 chat_id=ADMIN_GROUP_ID,
                 photo=photo[-1].file_id,
                 caption=task_message,
@@ -1282,6 +3285,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
             if order_details:
                 users['pending_orders'][order_id] = order_details
+                picker_lists['pending_orders'].add(order_id)
                 client_data['step'] = 'awaiting_payment'
                 client_data['order_id'] = order_id
                 await save_users()
@@ -1297,156 +3301,379 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     )
 # Part 4: Webhook, Daily Tips Scheduler, and Main for vibelift_bot.py
 
-# Flask Routes
-@app.route('/', methods=['GET', 'HEAD'])
-async def root():
-    return jsonify({"status": "Vibeliftbot’s alive and kicking! 🚀"}), 200
+# Payment confirmations
+# The webhook only checks the signature, records the event in
+# users['payment_events'] with a durable flush and answers Paystack straight
+# away. PAYMENT_WORKERS verify each event against the API and run
+# confirm_order_payment(); failed verifications retry with backoff, and events
+# still on disk after a restart are picked up again by start().
+PAYMENT_WORKERS = int(os.getenv("PAYMENT_WORKERS", 4))
+PAYMENT_MAX_ATTEMPTS = int(os.getenv("PAYMENT_MAX_ATTEMPTS", 6))
+PAYMENT_RETRY_BASE = 5  # seconds, doubled per attempt
+PAYMENT_RETRY_CAP = 300
 
-@app.route('/paystack-webhook', methods=['POST'])
-async def paystack_webhook():
-    payload = request.get_json()
-    logger.info(f"Paystack webhook received with payload: {json.dumps(payload)}")
-    
-    if payload.get('event') != 'charge.success':
-        logger.info(f"Ignoring non-success event: {payload.get('event')}")
-        return jsonify({"status": "ignored"}), 200
-    
-    reference = payload['data']['reference']
-    order_id = payload['data']['metadata'].get('order_id')
-    logger.info(f"Processing webhook for reference: {reference}, order_id: {order_id}")
-    
-    url = f"https://api.paystack.co/transaction/verify/{reference}"
-    headers = {"Authorization": f"Bearer {PAYSTACK_SECRET_KEY}"}
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as resp:
-            verify_data = await resp.json()
-            logger.info(f"Paystack verify response: {resp.status} - {json.dumps(verify_data)}")
-            if resp.status != 200 or not verify_data['status']:
-                logger.error(f"Verification failed for reference {reference}")
-                return jsonify({"status": "verification failed"}), 400
-    
-    if not order_id or order_id not in users['pending_orders']:
-        logger.warning(f"Order {order_id or reference} not found in pending_orders")
-        return jsonify({"status": "order not found"}), 404
-    
-    order = users['pending_orders'].pop(order_id)
-    client_id = order['client_id']
-    order['paystack_reference'] = reference
-    users['active_orders'][order_id] = order
-    users['clients'][client_id]['step'] = 'awaiting_approval'
-    await save_users()
-    
-    try:
-        await application.bot.send_message(
-            chat_id=int(client_id),
-            text=f"🎉 Payment for order *{order_id}* confirmed! 💰\n[Order ➡️ Payment ➡️ *Approval* ➡️ Active]\nAdmins are on it—check /status!",
-            parse_mode='Markdown'
-        )
-        logger.info(f"Notified client {client_id} of payment success")
-    except Exception as e:
-        logger.warning(f"Failed to notify client {client_id}: {e}")
-    
+def verify_paystack_signature(raw_body: bytes, signature: str) -> bool:
+    if not PAYSTACK_SECRET_KEY or not signature:
+        return False
+    expected = hmac.new(PAYSTACK_SECRET_KEY.encode(), raw_body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+def new_order_alert(order_id: str, order: dict, reference: str) -> None:
     order_message = (
         f"🌟 *New Order Up for Grabs* (ID: {order_id}) 🌟\n"
-        f"Client ID: {client_id}\n"
+        f"Client ID: {order['client_id']}\n"
         f"Platform: {order['platform'].capitalize()}\n"
         f"Handle/URL: {order['handle_or_url']}\n"
         f"Follows: {order['follows']} | Likes: {order['likes']} | Comments: {order['comments']}\n"
         f"Price: ₦{order['price']}\n"
         f"Paystack Ref: {reference}"
     )
-    keyboard = [
-        [InlineKeyboardButton("Approve ✅", callback_data=f"admin_approve_order_{order_id}"),
-         InlineKeyboardButton("Reject ❌", callback_data=f"admin_reject_order_{order_id}")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    try:
-        if 'screenshot' in order and order['screenshot']:
-            await application.bot.send_photo(
-                chat_id=ADMIN_GROUP_ID,
-                photo=order['screenshot'],
-                caption=order_message,
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
-            )
-        else:
-            await application.bot.send_message(
-                chat_id=ADMIN_GROUP_ID,
-                text=order_message,
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
-            )
-        logger.info(f"Sent order {order_id} to review group {ADMIN_GROUP_ID}")
-    except Exception as e:
-        logger.warning(f"Failed to notify review group {ADMIN_GROUP_ID}: {e}")
-    
-    return jsonify({"status": "success"}), 200
+    reply_markup = InlineKeyboardMarkup([
+        [InlineKeyboardButton("Approve ✅", callback_data=cb('ao', order_id)),
+         InlineKeyboardButton("Reject ❌", callback_data=cb('ro', order_id))]
+    ])
+    if order.get('screenshot'):
+        enqueue_photo(
+            chat_id=ADMIN_GROUP_ID,
+            photo=order['screenshot'],
+            caption=order_message,
+            reply_markup=reply_markup,
+            parse_mode='Markdown'
+        )
+    else:
+        enqueue_message(
+            chat_id=ADMIN_GROUP_ID,
+            text=order_message,
+            reply_markup=reply_markup,
+            parse_mode='Markdown'
+        )
+    logger.info(f"Queued order {order_id} for review group {ADMIN_GROUP_ID}")
 
-@app.route('/static/success.html')
-async def serve_success():
-    reference = request.args.get('reference', request.args.get('trxref', ''))
-    if not reference or reference not in users['pending_orders']:
-        logger.warning(f"Success page hit with invalid/missing reference: {request.args}")
-        return Response("Oops, order’s lost in the vibe! 🚫 Check /status or retry with /client!", status=400)
-    
-    order_id = reference
-    order = users['pending_orders'][order_id]
+def apply_payment_confirmation(order_id: str, reference: str):
+    """Move a paid order from pending to active in memory; returns it, or None if it wasn't pending."""
+    if order_id not in users['pending_orders']:
+        return None
+    order = users['pending_orders'].pop(order_id)
+    picker_lists['pending_orders'].discard(order_id)
     client_id = order['client_id']
+    order['paystack_reference'] = reference
+    invalidate_payment_link(order)
+    users['active_orders'][order_id] = order
+    task_index.open_order(order_id, order['platform'])
+    payment_dedup.mark(reference_key(reference))
+    if client_id in users['clients']:
+        users['clients'][client_id]['step'] = 'awaiting_approval'
+    return order
+
+def notify_payment_confirmed(order_id: str, order: dict, reference: str) -> None:
+    enqueue_message(
+        chat_id=int(order['client_id']),
+        text=f"🎉 Payment for order *{order_id}* confirmed! 💰\n[Order ➡️ Payment ➡️ *Approval* ➡️ Active]\nAdmins are on it—check /status!",
+        parse_mode='Markdown'
+    )
+    new_order_alert(order_id, order, reference)
+
+async def confirm_order_payment(order_id: str, reference: str) -> bool:
+    """Activate a paid order, persist it and tell everyone; False if it wasn't pending."""
+    order = apply_payment_confirmation(order_id, reference)
+    if order is None:
+        return False
+    await flush_users()
+    notify_payment_confirmed(order_id, order, reference)
+    return True
+
+# Payment reconciliation
+# Catches payments whose webhook never arrived: every RECONCILE_INTERVAL the job
+# pages through Paystack's successful transactions since the last watermark
+# (less RECONCILE_OVERLAP for late settlements) and confirms any that match a
+# pending order, all in one flush. The watermark lives in users['reconciler'].
+RECONCILE_INTERVAL = int(os.getenv("RECONCILE_INTERVAL", 600))
+RECONCILE_LOOKBACK = int(os.getenv("RECONCILE_LOOKBACK", 2 * 24 * 3600))  # first run
+RECONCILE_OVERLAP = 300
+RECONCILE_PAGE_SIZE = 100
+RECONCILE_MAX_PAGES = 50
+reconcile_stats = {'runs': 0, 'fetched': 0, 'confirmed': 0, 'errors': 0, 'truncated': 0}
 
-    # Check if already processed
-    if 'processed' in order and order['processed']:
-        logger.info(f"Order {order_id} already processed, serving success page only")
+async def reconcile_payments() -> int:
+    state = users['reconciler'].get('paystack', {})
+    started = time.time()
+    if not users['pending_orders']:
+        users['reconciler']['paystack'] = {'watermark': started}
+        await save_users()
+        return 0
+    since = state.get('watermark', started - RECONCILE_LOOKBACK) - RECONCILE_OVERLAP
+    since_iso = datetime.fromtimestamp(since, timezone.utc).isoformat()
+    matched = []
+    page = 1
+    complete = False
+    try:
+        while page <= RECONCILE_MAX_PAGES:
+            transactions, meta = await paystack.list_transactions(
+                page=page, per_page=RECONCILE_PAGE_SIZE, status='success', since=since_iso
+            )
+            reconcile_stats['fetched'] += len(transactions)
+            for tx in transactions:
+                reference = tx.get('reference')
+                if not reference or payment_dedup.seen(reference_key(reference)):
+                    continue
+                order_id = (tx.get('metadata') or {}).get('order_id') or order_id_for_reference(reference)
+                order = users['pending_orders'].get(order_id)
+                if order is not None and tx.get('amount', 0) >= order['price'] * 100:
+                    matched.append((order_id, reference))
+            if not transactions or page >= meta.get('pageCount', page):
+                complete = True
+                break
+            page += 1
+    except PaystackError as e:
+        reconcile_stats['errors'] += 1
+        logger.error(f"Payment reconciliation stopped at page {page}: {e}")
+        return 0
+    confirmed = []
+    for order_id, reference in matched:
+        order = apply_payment_confirmation(order_id, reference)
+        if order is not None:
+            confirmed.append((order_id, order, reference))
+    if complete:
+        users['reconciler']['paystack'] = {'watermark': started}
     else:
-        # Move order to active_orders and mark as processed
-        order['processed'] = True
-        users['active_orders'][order_id] = order
-        del users['pending_orders'][order_id]
-        users['clients'][client_id]['step'] = 'awaiting_approval'
+        # Pages come newest first, so the ones past the cap are the oldest: keep
+        # the old watermark (pinned on a first run) and page through them again.
+        reconcile_stats['truncated'] += 1
+        users['reconciler']['paystack'] = {'watermark': since + RECONCILE_OVERLAP}
+        logger.warning(f"Payment reconciliation stopped at {RECONCILE_MAX_PAGES} pages; next run starts again from {since_iso}")
+    await flush_users()
+    for order_id, order, reference in confirmed:
+        notify_payment_confirmed(order_id, order, reference)
+    reconcile_stats['runs'] += 1
+    reconcile_stats['confirmed'] += len(confirmed)
+    if confirmed:
+        logger.warning(f"Reconciler confirmed {len(confirmed)} payments the webhook missed: {[r for _, _, r in confirmed]}")
+    return len(confirmed)
+
+# Payments already dealt with, keyed "ref:<reference>" and "evt:<event>:<id>", so
+# Paystack retries and success-page reloads are dict lookups instead of verify
+# calls. Entries live PAYMENT_DEDUP_TTL; the oldest go first past
+# PAYMENT_DEDUP_MAX. users['payment_seen'] keeps them across restarts.
+PAYMENT_DEDUP_TTL = int(os.getenv("PAYMENT_DEDUP_TTL", 7 * 24 * 3600))
+PAYMENT_DEDUP_MAX = int(os.getenv("PAYMENT_DEDUP_MAX", 50_000))
+PAYMENT_DEDUP_SWEEP_INTERVAL = 3600
+
+class PaymentDedup:
+    def __init__(self):
+        self.expiry = OrderedDict()  # key -> expires, oldest first
+        self.stats = {'hits': 0, 'evicted': 0}
+
+    def __len__(self):
+        return len(self.expiry)
+
+    def rebuild(self, state: dict) -> None:
+        self.expiry = OrderedDict(sorted(state['payment_seen'].items(), key=lambda item: item[1]))
+
+    def seen(self, *keys) -> bool:
+        now = time.time()
+        if any(self.expiry.get(key, 0) > now for key in keys if key):
+            self.stats['hits'] += 1
+            return True
+        return False
+
+    def mark(self, *keys) -> None:
+        expires = time.time() + PAYMENT_DEDUP_TTL
+        for key in filter(None, keys):
+            self.expiry.pop(key, None)
+            self.expiry[key] = expires
+            users['payment_seen'][key] = expires
+        while len(self.expiry) > PAYMENT_DEDUP_MAX:
+            self._drop(self.expiry.popitem(last=False)[0])
+
+    def forget(self, *keys) -> None:
+        for key in filter(None, keys):
+            if self.expiry.pop(key, None) is not None:
+                users['payment_seen'].pop(key, None)
+
+    def _drop(self, key: str) -> None:
+        users['payment_seen'].pop(key, None)
+        self.stats['evicted'] += 1
+
+    def evict_due(self, now: float) -> int:
+        evicted = 0
+        while self.expiry and next(iter(self.expiry.values())) <= now:
+            self._drop(self.expiry.popitem(last=False)[0])
+            evicted += 1
+        return evicted
+
+    def metrics(self) -> dict:
+        return {**self.stats, 'keys': len(self.expiry)}
+
+payment_dedup = PaymentDedup()
+
+def reference_key(reference: str) -> str:
+    return f"ref:{reference}"
+
+def event_key(payload: dict):
+    transaction_id = payload.get('data', {}).get('id')
+    return f"evt:{payload.get('event')}:{transaction_id}" if transaction_id is not None else None
+
+async def evict_payment_keys() -> None:
+    if payment_dedup.evict_due(time.time()):
         await save_users()
 
-        # Notify client
-        try:
-            await application.bot.send_message(
-                chat_id=int(client_id),
-                text=f"🎉 Cha-ching! Your payment for order *{order_id}* is golden! 💰\n[Order ➡️ Payment ➡️ *Approval* ➡️ Active]\nAdmins are on it—check /status!"
-            )
-            logger.info(f"Fallback: Notified client {client_id} from success page")
-        except Exception as e:
-            logger.warning(f"Fallback notification failed for {client_id}: {e}")
-
-        # Notify admin group
-        order_message = (
-            f"🌟 *New Order Up for Grabs* (ID: {order_id}) 🌟\n"
-            f"Client ID: {client_id}\n"
-            f"Platform: {order['platform'].capitalize()}\n"
-            f"Handle/URL: {order['handle_or_url']}\n"
-            f"Follows: {order['follows']} | Likes: {order['likes']} | Comments: {order['comments']}\n"
-            f"Price: ₦{order['price']}"
-        )
-        keyboard = [
-            [InlineKeyboardButton("Approve ✅", callback_data=f"admin_approve_order_{order_id}"),
-             InlineKeyboardButton("Reject ❌", callback_data=f"admin_reject_order_{order_id}")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+class PaymentQueue:
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.workers = []
+        self.in_flight = set()
+        self.ack_timings = deque(maxlen=1000)  # ms from webhook arrival to 200
+        self.stats = {'received': 0, 'confirmed': 0, 'retried': 0, 'failed': 0, 'unmatched': 0, 'rejected': 0}
+
+    def put(self, reference: str) -> None:
+        self.queue.put_nowait(reference)
+
+    def record_ack(self, seconds: float) -> None:
+        self.ack_timings.append(seconds * 1000)
+
+    def start(self) -> None:
+        for reference in users['payment_events']:
+            self.put(reference)
+        for _ in range(PAYMENT_WORKERS):
+            self.workers.append(asyncio.create_task(self._drain()))
+
+    async def _drain(self) -> None:
+        while True:
+            reference = await self.queue.get()
+            try:
+                if reference not in self.in_flight:
+                    self.in_flight.add(reference)
+                    try:
+                        await self._process(reference)
+                    finally:
+                        self.in_flight.discard(reference)
+            except Exception as e:
+                logger.error(f"Payment worker error on {reference}: {e}", exc_info=True)
+            finally:
+                self.queue.task_done()
+
+    async def _process(self, reference: str) -> None:
+        event = users['payment_events'].get(reference)
+        if event is None:
+            return  # handled while this copy sat in the queue
+        order_id = event['order_id']
+        order = users['pending_orders'].get(order_id)
+        if order is None:
+            self.stats['unmatched'] += 1
+            logger.info(f"Payment {reference} matches no pending order {order_id}, dropping")
+            users['payment_events'].pop(reference, None)
+            payment_dedup.mark(reference_key(reference))
+            await save_users()
+            return
         try:
-            if 'screenshot' in order and order['screenshot']:
-                await application.bot.send_photo(
-                    chat_id=ADMIN_GROUP_ID,
-                    photo=order['screenshot'],
-                    caption=order_message,
-                    reply_markup=reply_markup,
-                    parse_mode='Markdown'
-                )
+            verified = await paystack.verify_transaction(reference)
+        except PaystackError as e:
+            event = users['payment_events'].get(reference, event)  # re-touch after the await, as in issue_payment_link
+            event['attempts'] += 1
+            if event['attempts'] >= PAYMENT_MAX_ATTEMPTS:
+                self.stats['failed'] += 1
+                logger.error(f"Giving up verifying payment {reference} after {event['attempts']} tries: {e}")
+                users['payment_events'].pop(reference, None)
+                payment_dedup.forget(event.get('event_key'))  # let a Paystack retry have another go
             else:
-                await application.bot.send_message(
-                    chat_id=ADMIN_GROUP_ID,
-                    text=order_message,
-                    reply_markup=reply_markup,
-                    parse_mode='Markdown'
-                )
-            logger.info(f"Fallback: Sent order {order_id} to review group {ADMIN_GROUP_ID}")
-        except Exception as e:
-            logger.warning(f"Failed to notify review group {ADMIN_GROUP_ID}: {e}")
+                self.stats['retried'] += 1
+                delay = min(PAYMENT_RETRY_BASE * 2 ** (event['attempts'] - 1), PAYMENT_RETRY_CAP)
+                logger.warning(f"Verify for payment {reference} failed ({e}), retrying in {delay}s")
+                asyncio.get_running_loop().call_later(delay, self.put, reference)
+            await save_users()
+            return
+        users['payment_events'].pop(reference, None)
+        if verified.get('status') != 'success' or verified.get('amount', 0) < order['price'] * 100:
+            self.stats['failed'] += 1
+            logger.error(f"Payment {reference} didn't check out: {verified.get('status')}, {verified.get('amount')} kobo")
+            await save_users()
+            return
+        await confirm_order_payment(order_id, reference)
+        self.stats['confirmed'] += 1
+        logger.info(f"Payment {reference} confirmed for order {order_id} via {event['source']}")
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            'queued': self.queue.qsize(),
+            'pending_events': len(users['payment_events']),
+            'in_flight': len(self.in_flight),
+            'p50_ack_ms': round(percentile(list(self.ack_timings), 50), 2),
+            'p99_ack_ms': round(percentile(list(self.ack_timings), 99), 2),
+        }
+
+payment_queue = PaymentQueue()
+
+async def enqueue_payment(reference: str, order_id: str, source: str, event_id: str = None) -> None:
+    """Record a payment to verify, durably, and hand it to the workers."""
+    payment_queue.stats['received'] += 1
+    payment_dedup.mark(event_id)
+    if reference in users['payment_events']:
+        return  # already waiting on a worker
+    users['payment_events'][reference] = {
+        'order_id': order_id,
+        'source': source,
+        'event_key': event_id,
+        'received': time.time(),
+        'attempts': 0,
+    }
+    await flush_users()
+    payment_queue.put(reference)
+
+# Flask Routes
+@app.route('/', methods=['GET', 'HEAD'])
+async def root():
+    return jsonify({"status": "Vibeliftbot’s alive and kicking! 🚀"}), 200
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    return jsonify({
+        "storage": storage_metrics(),
+        "rate_limiter": {"keys": len(rate_limiter.buckets)},
+        "outbox": outbox.metrics(),
+        "scheduler": scheduler.metrics(),
+        "paystack": paystack.metrics(),
+        "payments": payment_queue.metrics(),
+        "payment_dedup": payment_dedup.metrics(),
+        "reconciler": {**reconcile_stats, **users['reconciler'].get('paystack', {})},
+    }), 200
+
+@app.route('/paystack-webhook', methods=['POST'])
+async def paystack_webhook():
+    started = time.perf_counter()
+    raw_body = request.get_data()
+    if not verify_paystack_signature(raw_body, request.headers.get('x-paystack-signature', '')):
+        logger.warning("Paystack webhook with a bad signature, rejected")
+        payment_queue.stats['rejected'] += 1
+        return jsonify({"status": "invalid signature"}), 401
+    payload = json.loads(raw_body)
+    logger.info(f"Paystack webhook received: {payload.get('event')} {payload.get('data', {}).get('reference')}")
+
+    if payload.get('event') != 'charge.success':
+        logger.info(f"Ignoring non-success event: {payload.get('event')}")
+        return jsonify({"status": "ignored"}), 200
+
+    reference = payload['data']['reference']
+    event_id = event_key(payload)
+    if payment_dedup.seen(event_id, reference_key(reference)):
+        logger.info(f"Duplicate Paystack event for {reference}, already handled")
+        payment_queue.record_ack(time.perf_counter() - started)
+        return jsonify({"status": "duplicate"}), 200
+    order_id = (payload['data'].get('metadata') or {}).get('order_id') or order_id_for_reference(reference)
+    await enqueue_payment(reference, order_id, 'webhook', event_id)
+    payment_queue.record_ack(time.perf_counter() - started)
+    return jsonify({"status": "queued"}), 200
+
+@app.route('/static/success.html')
+async def serve_success():
+    reference = request.args.get('reference', request.args.get('trxref', ''))
+    order_id = order_id_for_reference(reference)
+    if reference and not payment_dedup.seen(reference_key(reference)) and order_id in users['pending_orders']:
+        # Verified and confirmed in the background, same as a webhook.
+        await enqueue_payment(reference, order_id, 'success_page')
+    elif not reference or order_id not in users['active_orders']:
+        logger.warning(f"Success page hit with invalid/missing reference: {request.args}")
+        return Response("Oops, order’s lost in the vibe! 🚫 Check /status or retry with /client!", status=400)
 
     # Serve success page
     html_content = f"""
@@ -1491,51 +3718,475 @@ async def telegram_webhook():
         logger.error(f"Failed to process webhook update: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
-# Daily Tips Scheduler
-async def send_daily_tips():
-    while True:
-        now = datetime.now(timezone.utc)
-        next_run = now.replace(hour=9, minute=0, second=0, microsecond=0)
-        if now.hour >= 9:
-            next_run = next_run.replace(day=now.day + 1)
-        wait_seconds = (next_run - now).total_seconds()
-        await asyncio.sleep(wait_seconds)
-        tip = random.choice(daily_tips)
-        for user_id in set(users['clients'].keys()) | set(users['engagers'].keys()):
-            if users.get('daily_tip', {}).get(user_id, 0) != now.day:
+# Outbound Telegram traffic
+# Every bot-initiated send shares one pacer under Telegram's global ~30 msg/s
+# limit; group chats additionally get their own ~20 msg/min pacer.
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", 25))
+TELEGRAM_GROUP_PER_MINUTE = float(os.getenv("TELEGRAM_GROUP_PER_MINUTE", 20))
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", 4))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))
+
+class RatePacer:
+    """Spaces out calls so that at most `rate` of them start per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            if self._next_slot > now:
+                await asyncio.sleep(self._next_slot - now)
+            self._next_slot = max(now, self._next_slot) + self.interval
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller back for `seconds`, e.g. after a RetryAfter."""
+        self._next_slot = max(self._next_slot, asyncio.get_running_loop().time() + seconds)
+
+telegram_pacer = RatePacer(TELEGRAM_GLOBAL_RATE)
+
+class Outbox:
+    """Queue of bot-initiated messages drained by background workers.
+
+    Handlers enqueue notifications and return without waiting on Telegram.
+    Messages for paced group chats get their own lane and worker, so a full
+    admin group never stalls user DMs. RetryAfter pauses the global pacer and
+    retries; network errors back off exponentially up to OUTBOX_MAX_ATTEMPTS.
+    """
+
+    def __init__(self, group_chats: list):
+        self.group_pacers = {str(chat_id): RatePacer(TELEGRAM_GROUP_PER_MINUTE / 60) for chat_id in group_chats}
+        self.lanes = {'default': asyncio.Queue()}
+        for chat_id in self.group_pacers:
+            self.lanes[chat_id] = asyncio.Queue()
+        self.stats = {'sent': 0, 'retried': 0, 'dropped': 0}
+        self.workers = []
+
+    def put(self, method: str, **kwargs) -> None:
+        lane = str(kwargs['chat_id'])
+        self.lanes[lane if lane in self.lanes else 'default'].put_nowait({'method': method, 'kwargs': kwargs, 'attempts': 0})
+
+    def start(self) -> None:
+        for lane, queue in self.lanes.items():
+            for _ in range(OUTBOX_WORKERS if lane == 'default' else 1):
+                self.workers.append(asyncio.create_task(self._drain(lane, queue)))
+
+    async def _drain(self, lane: str, queue: asyncio.Queue) -> None:
+        while True:
+            item = await queue.get()
+            try:
+                await self._deliver(lane, item)
+            except Exception as e:
+                logger.error(f"Outbox worker error on {lane}: {e}", exc_info=True)
+            finally:
+                queue.task_done()
+
+    async def _deliver(self, lane: str, item: dict) -> None:
+        while True:
+            if lane in self.group_pacers:
+                await self.group_pacers[lane].wait()
+            await telegram_pacer.wait()
+            item['attempts'] += 1
+            try:
+                await getattr(application.bot, item['method'])(**item['kwargs'])
+                self.stats['sent'] += 1
+                return
+            except RetryAfter as e:
+                telegram_pacer.pause(e.retry_after)
+                delay = 0
+            except (BadRequest, Forbidden) as e:
+                # BadRequest subclasses NetworkError but retrying it never helps.
+                self.stats['dropped'] += 1
+                logger.warning(f"Outbox dropped {item['method']} to {item['kwargs']['chat_id']}: {e}")
+                return
+            except (TimedOut, NetworkError) as e:
+                delay = min(60, 2 ** item['attempts'])
+                logger.warning(f"Outbox {item['method']} to {item['kwargs']['chat_id']} failed ({e}), retrying in {delay}s")
+            except Exception as e:
+                self.stats['dropped'] += 1
+                logger.warning(f"Outbox dropped {item['method']} to {item['kwargs']['chat_id']}: {e}")
+                return
+            if item['attempts'] >= OUTBOX_MAX_ATTEMPTS:
+                self.stats['dropped'] += 1
+                logger.warning(f"Outbox gave up on {item['method']} to {item['kwargs']['chat_id']} after {item['attempts']} attempts")
+                return
+            self.stats['retried'] += 1
+            await asyncio.sleep(delay)
+
+    async def drain(self, timeout: float) -> None:
+        """Give queued messages up to `timeout` seconds to go out, e.g. on shutdown."""
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in self.lanes.values())), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Outbox still held {self.metrics()['depth']} messages at shutdown")
+
+    def metrics(self) -> dict:
+        return {
+            'depth': sum(queue.qsize() for queue in self.lanes.values()),
+            'lanes': {lane: queue.qsize() for lane, queue in self.lanes.items()},
+            **self.stats,
+        }
+
+outbox = Outbox([ADMIN_GROUP_ID])
+
+def enqueue_message(chat_id, text: str, **kwargs) -> None:
+    outbox.put('send_message', chat_id=chat_id, text=text, **kwargs)
+
+def enqueue_photo(chat_id, photo: str, **kwargs) -> None:
+    outbox.put('send_photo', chat_id=chat_id, photo=photo, **kwargs)
+
+# Broadcasts
+# Bulk sends go through a fixed pool of workers on the shared Telegram pacer,
+# so a 50k-user blast takes about half an hour instead of hours.
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", 20))
+BROADCAST_CHECKPOINT = int(os.getenv("BROADCAST_CHECKPOINT", 500))
+
+async def broadcast(recipients, text: str, parse_mode: str = None, on_sent=None, on_checkpoint=None) -> dict:
+    """Send text to every recipient; returns {user_id: 'sent' | 'blocked' | error}.
+
+    on_sent(user_id) runs after each delivery and on_checkpoint() every
+    BROADCAST_CHECKPOINT deliveries, so callers can batch their bookkeeping.
+    """
+    results = {}
+    pending = iter(recipients)
+    delivered = 0
+
+    async def worker() -> None:
+        nonlocal delivered
+        for user_id in pending:
+            for attempt in range(2):
+                await telegram_pacer.wait()
                 try:
-                    await application.bot.send_message(
-                        chat_id=int(user_id),
-                        text=f"{tip}\nCatch you tomorrow for more vibes! 😎",
-                        parse_mode='Markdown'
-                    )
-                    if 'daily_tip' not in users:
-                        users['daily_tip'] = {}
-                    users['daily_tip'][user_id] = now.day
-                    await save_users()
+                    await application.bot.send_message(chat_id=int(user_id), text=text, parse_mode=parse_mode)
+                    results[user_id] = 'sent'
+                except RetryAfter as e:
+                    results[user_id] = f"rate limited for {e.retry_after}s"
+                    telegram_pacer.pause(e.retry_after)
+                    continue
+                except Forbidden:
+                    results[user_id] = 'blocked'
                 except Exception as e:
-                    logger.warning(f"Failed to send tip to {user_id}: {e}")
+                    results[user_id] = str(e)
+                break
+            if results[user_id] != 'sent':
+                continue
+            if on_sent:
+                on_sent(user_id)
+            delivered += 1
+            if on_checkpoint and delivered % BROADCAST_CHECKPOINT == 0:
+                await on_checkpoint()
+
+    await asyncio.gather(*(worker() for _ in range(BROADCAST_CONCURRENCY)))
+    return results
+
+def summarize_broadcast(results: dict) -> str:
+    sent = sum(1 for outcome in results.values() if outcome == 'sent')
+    blocked = sum(1 for outcome in results.values() if outcome == 'blocked')
+    return f"{sent} delivered, {blocked} blocked, {len(results) - sent - blocked} failed"
+
+# Job scheduler
+# One loop owns every timed job: a heap of (due, seq, job_id) sleeps until the
+# earliest entry is due. Recurring jobs follow a 5-field cron spec (UTC) or a
+# fixed interval; one-shot jobs name a registered handler plus JSON kwargs.
+# users['scheduler'] keeps each persisted job's last run and every pending
+# one-shot, so a restart neither double-fires nor drops work, and a recurring
+# slot missed while the bot was down runs once on startup. Recurring jobs
+# registered with persist=False (sweeps) keep no state at all.
+def parse_cron_field(field: str, low: int, high: int) -> set:
+    values = set()
+    for part in field.split(','):
+        step = 1
+        if '/' in part:
+            part, step = part.split('/')
+            step = int(step)
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = map(int, part.split('-'))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Bad cron field {field!r}")
+        values.update(range(start, end + 1, step))
+    return values
+
+class CronSchedule:
+    """minute hour day-of-month month day-of-week, evaluated in UTC."""
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron spec needs 5 fields: {expression!r}")
+        self.expression = expression
+        self.minutes = parse_cron_field(fields[0], 0, 59)
+        self.hours = parse_cron_field(fields[1], 0, 23)
+        self.days = parse_cron_field(fields[2], 1, 31)
+        self.months = parse_cron_field(fields[3], 1, 12)
+        self.weekdays = {d % 7 for d in parse_cron_field(fields[4], 0, 7)}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    def day_matches(self, dt: datetime) -> bool:
+        in_month = dt.day in self.days
+        in_week = (dt.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week  # classic cron: either restricted field may match
+
+    def next_after(self, ts: float) -> float:
+        dt = datetime.fromtimestamp(ts, timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self.day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt.timestamp()
+        raise ValueError(f"Cron spec never fires: {self.expression!r}")
+
+class JobScheduler:
+    def __init__(self):
+        self.jobs = {}        # recurring job name -> {'handler', 'next', 'persist'}
+        self.handlers = {}    # one-shot handler name -> coroutine function
+        self.heap = []
+        self.running = set()
+        self.seq = itertools.count()
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.fired = 0
+
+    def register(self, name: str, handler, cron: str = None, every: float = None, persist: bool = True) -> None:
+        """Add a recurring job; persisted jobs remember their last run across restarts."""
+        if (cron is None) == (every is None):
+            raise ValueError("Give a job exactly one of cron= or every=")
+        next_due = CronSchedule(cron).next_after if cron else (lambda ts: ts + every)
+        self.jobs[name] = {'handler': handler, 'next': next_due, 'persist': persist}
+        if self.task:
+            self.push(next_due(time.time()), name)
+
+    def register_handler(self, name: str, handler) -> None:
+        self.handlers[name] = handler
+
+    async def schedule_once(self, handler_name: str, delay: float, **payload) -> str:
+        """Run a registered handler once after delay seconds; returns the job id."""
+        if handler_name not in self.handlers:
+            raise KeyError(f"No scheduler handler named {handler_name!r}")
+        job_id = f"once:{uuid.uuid4().hex[:12]}"
+        due = time.time() + delay
+        users['scheduler'][job_id] = {'handler': handler_name, 'due': due, 'payload': payload}
+        await flush_users()
+        self.push(due, job_id)
+        return job_id
+
+    async def cancel(self, job_id: str) -> bool:
+        # The heap entry stays behind and is skipped when it comes due.
+        if users['scheduler'].pop(job_id, None) is None:
+            return False
+        await flush_users()
+        return True
+
+    def push(self, due: float, job_id: str) -> None:
+        heapq.heappush(self.heap, (due, next(self.seq), job_id))
+        if self.heap[0][2] == job_id:
+            self.wakeup.set()
+
+    def start(self) -> None:
+        now = time.time()
+        state = users['scheduler']
+        for name, job in self.jobs.items():
+            last_run = state.get(name, {}).get('last_run') if job['persist'] else None
+            due = job['next'](last_run if last_run is not None else now)
+            self.push(max(due, now), name)
+        for job_id, job in state.items():
+            if job_id.startswith('once:'):
+                self.push(job['due'], job_id)
+        self.task = asyncio.create_task(self.run())
+
+    async def run(self) -> None:
+        while True:
+            delay = self.heap[0][0] - time.time() if self.heap else None
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+                continue
+            due, _, job_id = heapq.heappop(self.heap)
+            try:
+                await self.fire(job_id, due)
+            except Exception as e:
+                logger.error(f"Scheduler failed to fire {job_id}: {e}", exc_info=True)
+
+    async def fire(self, job_id: str, due: float) -> None:
+        job = self.jobs.get(job_id)
+        if job:
+            # Next slot is computed from now, so a long outage costs one catch-up run, not a burst.
+            self.push(job['next'](max(due, time.time())), job_id)
+            if job_id in self.running:
+                logger.warning(f"Job {job_id} still running; skipping this slot")
+                return
+            handler, payload, persisted = job['handler'], {}, job['persist']
+            if persisted:
+                users['scheduler'][job_id] = {'last_run': due}
+        else:
+            job = users['scheduler'].pop(job_id, None)
+            if job is None:
+                return  # cancelled
+            handler, payload, persisted = self.handlers.get(job['handler']), job.get('payload') or {}, True
+            if handler is None:
+                logger.error(f"Dropping {job_id}: no handler named {job['handler']}")
+                await save_users()
+                return
+        if persisted:
+            # Record the run before starting it: a crash mid-job skips the slot rather than repeating it.
+            await flush_users()
+        self.fired += 1
+        self.running.add(job_id)
+        asyncio.create_task(self.execute(job_id, handler, payload))
+
+    async def execute(self, job_id: str, handler, payload: dict) -> None:
+        try:
+            await handler(**payload)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+        finally:
+            self.running.discard(job_id)
+
+    def metrics(self) -> dict:
+        return {
+            'jobs': len(self.jobs),
+            'pending_one_shots': sum(1 for job_id in users.get('scheduler', {}) if job_id.startswith('once:')),
+            'running': len(self.running),
+            'fired': self.fired,
+            'next_due_in': round(self.heap[0][0] - time.time(), 1) if self.heap else None,
+        }
+
+scheduler = JobScheduler()
+
+# Daily Tips
+DAILY_TIP_CRON = os.getenv("DAILY_TIP_CRON", "0 9 * * *")
+
+async def send_daily_tips() -> None:
+    tip = random.choice(daily_tips)
+    today = datetime.now(timezone.utc).day
+    tip_log = users['daily_tip']
+    recipients = [
+        user_id for user_id in set(users['clients'].keys()) | set(users['engagers'].keys())
+        if tip_log.get(user_id, 0) != today
+    ]
+
+    def mark_tipped(user_id: str) -> None:
+        tip_log[user_id] = today
+
+    results = await broadcast(
+        recipients,
+        f"{tip}\nCatch you tomorrow for more vibes! 😎",
+        parse_mode='Markdown',
+        on_sent=mark_tipped,
+        on_checkpoint=save_users,
+    )
+    await save_users()
+    logger.info(f"Daily tip sent: {summarize_broadcast(results)}")
+
+# Callback routes: route -> (handler, admin only). button() splits and resolves
+# the args once; handlers take (update, context, user_id, *args).
+CALLBACK_ROUTES = {
+    'client': (command_route(client), False),
+    'engager': (command_route(engager), False),
+    'help': (command_route(help_command), False),
+    'tasks': (command_route(tasks), False),
+    'balance': (command_route(balance), False),
+    'withdraw': (command_route(withdraw), False),
+    'pf': (choose_platform, False),
+    'hp': (handle_help_button, False),
+    'cx': (handle_cancel_button, False),
+    'tc': (claim_task, False),
+    'tn': (claim_next_task, False),
+    'pg': (handle_page_button, False),
+    'pb': (functools.partial(handle_page_button, backwards=True), False),
+    'bk': (handle_bulk_button, True),
+    'sl': (toggle_selection, True),
+    'ad': (admin_dashboard_button, True),
+    'pk': (open_admin_picker, True),
+    'gc': (admin_generate_code, True),
+    'ao': (admin_approve_order, True),
+    'ro': (admin_reject_order, True),
+    'gt': (admin_generate_tasks, True),
+    'at': (admin_approve_task, True),
+    'rt': (admin_reject_task, True),
+    'ap': (admin_approve_payout, True),
+    'rp': (admin_reject_payout, True),
+    'pr': (admin_set_priority, True),
+    'co': (admin_cancel_order, True),
+}
+
+def ensure_collections(state: dict) -> None:
+    """Add any top-level collection an older state file does not have yet."""
+    if 'clients' not in state:
+        state['clients'] = {}
+    if 'engagers' not in state:
+        state['engagers'] = {}
+    if 'pending_orders' not in state:
+        state['pending_orders'] = {}
+    if 'active_orders' not in state:
+        state['active_orders'] = {}
+    if state.get('tasks'):
+        # Per-unit task records from before counters; the orders' counters replace them.
+        logger.info(f"Dropping {len(state['tasks'])} legacy task records")
+        state['tasks'] = {}
+    if 'pending_task_completions' not in state:
+        state['pending_task_completions'] = {}
+    if 'pending_admin_actions' not in state:
+        state['pending_admin_actions'] = {}
+    if 'referrals' not in state:
+        state['referrals'] = {}
+    if 'daily_tip' not in state:
+        state['daily_tip'] = {}
+    if 'scheduler' not in state:
+        state['scheduler'] = {}
+    if 'task_leases' not in state:
+        state['task_leases'] = {}
+    if 'callback_tokens' not in state:
+        state['callback_tokens'] = {}
+    if 'payment_events' not in state:
+        state['payment_events'] = {}
+    if 'payment_seen' not in state:
+        state['payment_seen'] = {}
+    if 'reconciler' not in state:
+        state['reconciler'] = {}
+
+def rebuild_indexes(state: dict) -> None:
+    """Build every in-memory index from the loaded state.
+
+    This decodes the order, lease, completion, token and payment collections, so
+    main() runs it on storage_executor before the bot starts taking updates. The
+    engager-derived indexes (claims, payout queue, leaderboard) only remember the
+    state here and scan the engagers on first use, which keeps startup lazy.
+    """
+    task_index.rebuild(state)
+    lease_book.rebuild(state)
+    rebuild_picker_lists(state)
+    callback_tokens.rebuild(state)
+    leaderboard_index.rebuild(state)
+    payment_dedup.rebuild(state)
 
 # Main Function
 async def main():
     global application, users
     users = await load_users()
-    if 'clients' not in users:
-        users['clients'] = {}
-    if 'engagers' not in users:
-        users['engagers'] = {}
-    if 'pending_orders' not in users:
-        users['pending_orders'] = {}
-    if 'active_orders' not in users:
-        users['active_orders'] = {}
-    if 'pending_task_completions' not in users:
-        users['pending_task_completions'] = {}
-    if 'pending_admin_actions' not in users:
-        users['pending_admin_actions'] = {}
-    if 'referrals' not in users:
-        users['referrals'] = {}
-    if 'daily_tip' not in users:
-        users['daily_tip'] = {}
+    ensure_collections(users)
+    started = time.perf_counter()
+    await asyncio.get_running_loop().run_in_executor(storage_executor, rebuild_indexes, users)
+    logger.info(f"In-memory indexes rebuilt in {(time.perf_counter() - started) * 1000:.1f}ms")
 
     application = Application.builder().token(BOT_TOKEN).build()
 
@@ -1550,6 +4201,7 @@ async def main():
     application.add_handler(CommandHandler("cancel", cancel))
     application.add_handler(CommandHandler("order", order))
     application.add_handler(CommandHandler("admin", admin))
+    application.add_handler(CommandHandler("announce", announce))
     application.add_handler(CommandHandler("balance", balance))
     application.add_handler(CommandHandler("withdraw", withdraw))
     application.add_handler(CommandHandler("refer", refer))
@@ -1572,8 +4224,27 @@ async def main():
     await application.start()
     logger.info("Application started—ready for action!")
 
-    asyncio.create_task(send_daily_tips())
-    logger.info("Daily tips scheduler fired up! ✨")
+    outbox.start()
+    logger.info("Outbox workers standing by! 📬")
+
+    await paystack.start()
+    logger.info(f"Paystack client pooled up against {paystack.base_url} 💳")
+
+    payment_queue.start()
+    logger.info(f"Payment workers on duty with {len(users['payment_events'])} events carried over! 🧾")
+
+    asyncio.create_task(users_flusher())
+    logger.info("Write-behind flusher humming! 💾")
+
+    scheduler.register('daily_tip', send_daily_tips, cron=DAILY_TIP_CRON)
+    scheduler.register('compact_state', compact_state, every=JOURNAL_COMPACT_INTERVAL, persist=False)
+    scheduler.register('expire_task_leases', expire_task_leases, every=LEASE_SWEEP_INTERVAL, persist=False)
+    scheduler.register('dashboard_self_check', check_dashboard_counters, every=DASHBOARD_CHECK_INTERVAL, persist=False)
+    scheduler.register('evict_callback_tokens', evict_callback_tokens, every=CALLBACK_TOKEN_SWEEP_INTERVAL, persist=False)
+    scheduler.register('evict_payment_keys', evict_payment_keys, every=PAYMENT_DEDUP_SWEEP_INTERVAL, persist=False)
+    scheduler.register('reconcile_payments', reconcile_payments, every=RECONCILE_INTERVAL)
+    scheduler.start()
+    logger.info("Job scheduler fired up—daily tips and compaction on the clock! ⏰")
 
     asgi_app = WsgiToAsgi(app)
     config = uvicorn.Config(
@@ -1583,7 +4254,21 @@ async def main():
         log_level="info"
     )
     server = uvicorn.Server(config)
-    await server.serve()
+    try:
+        await server.serve()
+    finally:
+        await outbox.drain(timeout=10)
+        await paystack.close()
+        await flush_users()
+        await users_store.close()
+        logger.info("State flushed to disk—safe to bounce! 👋")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if sys.argv[1:2] == ['migrate-sqlite']:
+        # python vibelift_bot.py migrate-sqlite [users.json | data-dir] [vibelift.db]
+        asyncio.run(migrate_to_sqlite(*sys.argv[2:4]))
+    elif sys.argv[1:2] == ['bench-snapshot']:
+        # python vibelift_bot.py bench-snapshot [sizes...]
+        benchmark_snapshot_formats([int(n) for n in sys.argv[2:]] or [10_000, 100_000, 1_000_000])
+    else:
+        asyncio.run(main())
\ No newline at end of file